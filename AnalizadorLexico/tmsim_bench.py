@@ -0,0 +1,44 @@
+﻿import argparse
+import os
+import random
+import sys
+import time
+
+from tmsim_gui import REGEX_TABLE
+from tmsim_pool import evaluate_parallel, evaluate_threaded
+
+# Compara el lote con hilos contra el lote con procesos en todas las máquinas de
+# REGEX_TABLE. Uso: python tmsim_bench.py [-n ENTRADAS] [--length L] [--workers W]
+
+def random_corpus(alphabet: str, n: int, length: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, length))) for _ in range(n)]
+
+def _alphabet(item) -> str:
+    return item["alphabet"].strip("{}").replace(",", "")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hilos vs. procesos sobre REGEX_TABLE")
+    parser.add_argument("-n", type=int, default=200_000, help="entradas por máquina")
+    parser.add_argument("--length", type=int, default=32, help="longitud máxima de cada entrada")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}  GIL={'sí' if gil else 'no'}  workers={args.workers}")
+    print(f"{'máquina':<16}{'hilos (ent/s)':>16}{'procesos (ent/s)':>20}{'aceptadas':>12}")
+    for i, item in enumerate(REGEX_TABLE):
+        corpus = random_corpus(_alphabet(item), args.n, args.length, seed=i)
+        t = time.perf_counter()
+        threaded = evaluate_threaded(i, corpus, workers=args.workers)
+        t_threads = time.perf_counter() - t
+        t = time.perf_counter()
+        procs = evaluate_parallel(i, corpus, workers=args.workers)
+        t_procs = time.perf_counter() - t
+        if threaded.status != procs.status or threaded.steps != procs.steps:
+            raise SystemExit(f"resultados distintos para {item['name']}")
+        print(f"{item['name']:<16}{args.n / t_threads:>16,.0f}{args.n / t_procs:>20,.0f}"
+              f"{sum(1 for s in threaded.status if s == 1):>12}")
+
+if __name__ == "__main__":
+    main()
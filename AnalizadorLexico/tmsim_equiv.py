@@ -0,0 +1,105 @@
+﻿import argparse
+from collections import deque
+from typing import Dict, List, Tuple, Union
+
+from tmsim_gui import (REGEX_TABLE, _DFA_FLAGS, _DFA_STUCK, CompiledMachine, DFAEngine,
+                       Execution, MachineSpec, regex_entry, symbol_of)
+from tmsim_regex import compile_pattern
+
+# Equivalencia de lenguajes por recorrido en anchura del autómata producto. Cada lado
+# (máquina equivalente a un AFD o patrón, que se compila con tmsim_regex) se reduce a
+# su DFAEngine; una parada a mitad de la cadena lleva a un sumidero de aceptación o de
+# rechazo. El primer par de estados que discrepa al terminar la cadena da la cadena
+# distintiva más corta (y, entre las más cortas, la menor en orden lexicográfico).
+#
+# Uso: python tmsim_equiv.py   (compara cada máquina de REGEX_TABLE con su patrón)
+
+Side = Union[str, MachineSpec, Execution]
+
+# Estados de cada lado en el producto: los del AFD (>= 0) o uno de los sumideros.
+_ACCEPTED = -1
+_REJECTED = -2
+
+def _machine(side: Side) -> Tuple[CompiledMachine, DFAEngine]:
+    spec = compile_pattern(side) if isinstance(side, str) else side
+    cm = spec.compile()
+    dfa = cm.dfa
+    if dfa is None:
+        raise ValueError("la comparación requiere máquinas equivalentes a un AFD")
+    return cm, dfa
+
+def _symbols(engines: List[DFAEngine]) -> List[Tuple[str, int]]:
+    # Un representante por cada clase de códigos que ningún lado distingue; el blanco
+    # (código 0) no puede aparecer dentro de una cadena. Se prefiere un símbolo visible.
+    classes: Dict[tuple, List[int]] = {}
+    for c in range(1, 256):
+        key = tuple(tuple(dfa.table[(s << 8) | c] for s in range(len(dfa.tails))) for dfa in engines)
+        classes.setdefault(key, []).append(c)
+    out = []
+    for codes in classes.values():
+        c = min(codes, key=lambda c: (not (c < 128 and chr(c).isprintable()), c))
+        out.append((symbol_of(c), c))
+    return sorted(out)
+
+def _step(cm: CompiledMachine, dfa: DFAEngine, s: int, code: int) -> int:
+    if s < 0:
+        return s
+    e = dfa.table[(s << 8) | code]
+    if e < _DFA_FLAGS:
+        return e
+    if e & _DFA_STUCK:
+        return _REJECTED
+    return _ACCEPTED if cm.halting[e & 0xFFFF] == 1 else _REJECTED
+
+def _accepts(cm: CompiledMachine, dfa: DFAEngine, s: int) -> bool:
+    # ¿Acepta si la cadena termina en `s`?
+    if s < 0:
+        return s == _ACCEPTED
+    return cm.halting[dfa.tails[s][0]] == 1
+
+def distinguishing_string(a: Side, b: Side) -> str | None:
+    # Cadena más corta que uno de los lados acepta y el otro no, o None si aceptan el
+    # mismo lenguaje. Cada lado es una máquina (MachineSpec o ejecución) o un patrón.
+    # Coste O(|A|·|B|·|Σ|), con Σ reducido a las clases de símbolos distinguibles.
+    cma, dfa_a = _machine(a)
+    cmb, dfa_b = _machine(b)
+    symbols = _symbols([dfa_a, dfa_b])
+    start = (dfa_a.start, dfa_b.start)
+    parent: Dict[Tuple[int, int], Tuple[Tuple[int, int], str] | None] = {start: None}
+    queue = deque([start])
+    while queue:
+        pair = queue.popleft()
+        if _accepts(cma, dfa_a, pair[0]) != _accepts(cmb, dfa_b, pair[1]):
+            out = []
+            while parent[pair] is not None:
+                pair, sym = parent[pair]
+                out.append(sym)
+            return "".join(reversed(out))
+        for sym, code in symbols:
+            nxt = (_step(cma, dfa_a, pair[0], code), _step(cmb, dfa_b, pair[1], code))
+            if nxt not in parent:
+                parent[nxt] = (pair, sym)
+                queue.append(nxt)
+    return None
+
+def equivalent(a: Side, b: Side) -> bool:
+    return distinguishing_string(a, b) is None
+
+def check_entry(key: Union[str, int]) -> str | None:
+    # Compara la máquina de una entrada de REGEX_TABLE con su propio patrón.
+    item = regex_entry(key)
+    return distinguishing_string(item["factory"](), item["pattern"])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Equivalencia de REGEX_TABLE con sus patrones")
+    parser.parse_args(argv)
+    failed = False
+    for i, item in enumerate(REGEX_TABLE):
+        witness = check_entry(i)
+        failed |= witness is not None
+        print(f"{item['name']:<16}{'equivalente' if witness is None else f'distinta en {witness!r}'}")
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
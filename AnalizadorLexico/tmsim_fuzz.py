@@ -0,0 +1,253 @@
+﻿import argparse
+import os
+import random
+import re
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import product
+from typing import Callable, Dict, List, Tuple, Union
+
+from tmsim_gui import (REGEX_TABLE, ArrayTape, BufferTape, Execution, MachineSpec, PagedTape,
+                       RLETape, Tape, evaluate_many, regex_entry)
+from tmsim_trie import evaluate_shared_prefixes
+
+try:
+    from tmsim_numpy import evaluate_lockstep
+except ImportError:
+    evaluate_lockstep = None
+
+# Fuzzing diferencial: cada máquina de REGEX_TABLE contra re.fullmatch de su patrón.
+# Cada entrada pasa por el intérprete de referencia (step()) y por cada motor
+# optimizado (run(), AFD, prefijos compartidos y NumPy si está instalado), de modo
+# que un fallo de un motor no se confunde con uno de la máquina. Los trabajadores
+# generan y comprueban sus propias entradas (sólo viajan la semilla y las
+# discrepancias); el proceso principal reduce cada discrepancia a un contraejemplo
+# mínimo. Antes de las rondas, check_codec compara con step() todos los
+# caminos compilados sobre entradas con NUL y símbolos ajenos. Uso:
+#   python tmsim_fuzz.py [-n ENTRADAS] [--length L] [--workers W] [--seed S] [--duration SEG]
+
+# Símbolos ajenos que se mezclan con el alfabeto de cada entrada: los del resto de la
+# tabla, uno que no aparece en ninguna, el NUL y uno de fuera de latin-1.
+STRAY = "01abx\x00一"
+STRAY_RATE = 0.1
+DEFAULT_CHUNK = 4096
+# Discrepancias que devuelve cada bloque como mucho; el resto sólo se cuenta.
+MAX_REPORTED = 32
+
+@dataclass(frozen=True)
+class FuzzReport:
+    name: str
+    pattern: str
+    checked: int
+    mismatches: int
+    counterexamples: Tuple[str, ...]
+    seconds: float
+    # Caminos (step, run, dfa, trie, numpy) que discreparon de re en alguna entrada.
+    engines: Tuple[str, ...] = ()
+
+    @property
+    def rate(self) -> float:
+        return self.checked / self.seconds if self.seconds else 0.0
+
+def alphabet_of(item) -> str:
+    return item["alphabet"].strip("{}").replace(",", "")
+
+def symbols_of(item) -> Tuple[str, str]:
+    # (alfabeto, símbolos ajenos) de una entrada.
+    alphabet = alphabet_of(item)
+    return alphabet, "".join(c for c in STRAY if c not in alphabet)
+
+def random_inputs(item, rng: random.Random, n: int, length: int) -> List[str]:
+    alphabet, stray = symbols_of(item)
+    out = []
+    for _ in range(n):
+        k = rng.randint(0, length)
+        out.append("".join(rng.choice(stray) if stray and rng.random() < STRAY_RATE
+                           else rng.choice(alphabet) for _ in range(k)))
+    return out
+
+def boundary_inputs(item, length: int, exhaustive: int = 4) -> List[str]:
+    # Todas las cadenas cortas, los ejemplos con una edición de distancia y rachas
+    # largas de cada símbolo alrededor de `length`.
+    alphabet, stray = symbols_of(item)
+    symbols = alphabet + stray[:1]
+    seen = {"".join(t) for k in range(exhaustive + 1) for t in product(symbols, repeat=k)}
+    for ex in item["examples"]:
+        seen.add(ex)
+        for i in range(len(ex) + 1):
+            seen.add(ex[:i] + ex[i + 1:])
+            for c in symbols:
+                seen.add(ex[:i] + c + ex[i:])
+                seen.add(ex[:i] + c + ex[i + 1:])
+    for c in symbols:
+        for k in (length - 1, length, length + 1):
+            seen.add(c * max(k, 0))
+    for a, b in product(alphabet, repeat=2):
+        seen.add((a + b) * (length // 2))
+    return sorted(seen, key=lambda s: (len(s), s))
+
+# Entradas con símbolos que la codificación compacta trata aparte: el NUL (que no
+# puede confundirse con el blanco), ajenos de latin-1 y de fuera de latin-1.
+CODEC_CASES = ["\x00", "a\x00a", "\x00a", "a\x00", "0\x001", "ñ", "añ", "a一b", "一"]
+
+def step_status(spec: MachineSpec, s: str, max_steps: int = 1 << 20) -> str:
+    # Resultado del intérprete de referencia: step() sobre una cinta Tape.
+    ex = Execution(spec)
+    ex.load_input(s)
+    for _ in range(max_steps):
+        if not ex.step():
+            break
+    status = ex.status()
+    return "STUCK" if status == "RUNNING" else status
+
+def check_codec(key: Union[str, int]) -> List[Tuple[str, str, str]]:
+    # (entrada, camino, resultado) de cada camino compilado que no coincide con step().
+    spec = regex_entry(key)["factory"]().spec
+    out = []
+    for s in CODEC_CASES:
+        expected = step_status(spec, s)
+        got = {"evaluate": spec.evaluate(s).status,
+               "evaluate_many": evaluate_many(spec, [s])[0].status}
+        if all(ord(c) < 256 for c in s):
+            got["evaluate(bytes)"] = spec.evaluate(s.encode("latin-1")).status
+        for tape in (Tape, ArrayTape, RLETape, PagedTape, BufferTape):
+            ex = Execution(spec, tape())
+            ex.load_input(s)
+            got[f"run({tape.__name__})"] = ex.run().status
+        out += [(s, path, status) for path, status in got.items() if status != expected]
+    return out
+
+_worker_cache: Dict[Union[str, int], Tuple[MachineSpec, "re.Pattern"]] = {}
+
+def _checker(key: Union[str, int]) -> Tuple[MachineSpec, "re.Pattern"]:
+    try:
+        return _worker_cache[key]
+    except KeyError:
+        item = regex_entry(key)
+        spec = item["factory"]().spec
+        spec.compile().dfa
+        _worker_cache[key] = (spec, re.compile(item["pattern"]))
+        return _worker_cache[key]
+
+def run_status(spec: MachineSpec, s: str) -> str:
+    ex = Execution(spec)
+    ex.load_input(s)
+    return ex.run().status
+
+def _engines(spec: MachineSpec, inputs: List[str]) -> Dict[str, List[bool]]:
+    # ¿Acepta cada camino cada entrada?
+    out = {"step": [step_status(spec, s) == "ACCEPT" for s in inputs],
+           "run": [run_status(spec, s) == "ACCEPT" for s in inputs],
+           "dfa": [st == 1 for st in evaluate_many(spec, inputs).status],
+           "trie": [st == 1 for st in evaluate_shared_prefixes(spec, inputs).status]}
+    if evaluate_lockstep is not None:
+        out["numpy"] = [st == 1 for st in evaluate_lockstep(spec, inputs).status]
+    return out
+
+def _disagreeing(spec: MachineSpec, rx: "re.Pattern", inputs: List[str]) -> List[List[str]]:
+    # Por entrada, los caminos cuyo resultado no coincide con re.fullmatch.
+    expected = [rx.fullmatch(s) is not None for s in inputs]
+    engines = _engines(spec, inputs)
+    return [[name for name, got in engines.items() if got[i] != exp]
+            for i, exp in enumerate(expected)]
+
+def _check(key: Union[str, int], inputs: List[str]) -> Tuple[int, int, List[str], List[str]]:
+    # (comprobadas, discrepancias, primeras discrepancias, caminos que discreparon).
+    spec, rx = _checker(key)
+    wrong = _disagreeing(spec, rx, inputs)
+    bad = [s for s, names in zip(inputs, wrong) if names]
+    return len(inputs), len(bad), bad[:MAX_REPORTED], sorted({n for names in wrong for n in names})
+
+def _check_random(key: Union[str, int], seed: int, n: int, length: int) -> Tuple[int, int, List[str], List[str]]:
+    return _check(key, random_inputs(regex_entry(key), random.Random(seed), n, length))
+
+def shrink(s: str, failing: Callable[[str], bool], symbols: str) -> str:
+    # Reducción voraz: quita símbolos mientras siga fallando y después cambia cada uno
+    # por otro menor. El resultado es mínimo localmente (más corto y, a igual longitud,
+    # menor en orden lexicográfico).
+    order = sorted(set(symbols))
+    while True:
+        for i in range(len(s)):
+            t = s[:i] + s[i + 1:]
+            if failing(t):
+                s = t
+                break
+        else:
+            for i in range(len(s)):
+                t = next((t for c in order if c < s[i]
+                          for t in (s[:i] + c + s[i + 1:],) if failing(t)), None)
+                if t is not None:
+                    s = t
+                    break
+            else:
+                return s
+
+def fuzz_entry(key: Union[str, int], executor: Executor, n: int = 100_000, length: int = 24,
+               seed: int = 0, chunk_size: int = DEFAULT_CHUNK) -> FuzzReport:
+    item = regex_entry(key)
+    t = time.perf_counter()
+    jobs = [executor.submit(_check, key, boundary_inputs(item, length))]
+    for k, start in enumerate(range(0, n, chunk_size)):
+        jobs.append(executor.submit(_check_random, key, hash((seed, k)) & 0xFFFFFFFF,
+                                    min(chunk_size, n - start), length))
+    checked = mismatches = 0
+    found: List[str] = []
+    engines = set()
+    for job in jobs:
+        c, m, bad, names = job.result()
+        checked += c
+        mismatches += m
+        found += bad
+        engines.update(names)
+    seconds = time.perf_counter() - t
+    spec, rx = _checker(key)
+    failing = lambda s: bool(_disagreeing(spec, rx, [s])[0])
+    alphabet, stray = symbols_of(item)
+    shrunk = {shrink(s, failing, alphabet + stray) for s in found}
+    return FuzzReport(item["name"], item["pattern"], checked, mismatches,
+                      tuple(sorted(shrunk, key=lambda s: (len(s), s))), seconds, tuple(sorted(engines)))
+
+def fuzz_catalogue(executor: Executor, n: int = 100_000, length: int = 24, seed: int = 0,
+                   chunk_size: int = DEFAULT_CHUNK) -> List[FuzzReport]:
+    return [fuzz_entry(i, executor, n, length, seed, chunk_size) for i in range(len(REGEX_TABLE))]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fuzzing diferencial de REGEX_TABLE contra re")
+    parser.add_argument("-n", type=int, default=100_000, help="entradas aleatorias por máquina y ronda")
+    parser.add_argument("--length", type=int, default=24, help="longitud máxima de cada entrada")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--duration", type=float, default=0.0,
+                        help="segundos de prueba continua (0: una sola ronda)")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for i, item in enumerate(REGEX_TABLE):
+        for s, path, status in check_codec(i):
+            failed = True
+            print(f"{item['name']}: {path} da {status} con {s!r}, step() no")
+    deadline = time.perf_counter() + args.duration
+    with ProcessPoolExecutor(max_workers=args.workers) as ex:
+        rnd = 0
+        while True:
+            checked = 0
+            t = time.perf_counter()
+            print(f"ronda {rnd}  semilla {args.seed + rnd}")
+            print(f"{'máquina':<16}{'entradas':>12}{'ent/s':>14}{'fallos':>10}  contraejemplos")
+            for r in fuzz_catalogue(ex, args.n, args.length, args.seed + rnd):
+                checked += r.checked
+                failed |= r.mismatches > 0
+                shown = ", ".join(repr(s) for s in r.counterexamples[:5]) or "-"
+                if r.engines:
+                    shown += f"  ({', '.join(r.engines)})"
+                print(f"{r.name:<16}{r.checked:>12,}{r.rate:>14,.0f}{r.mismatches:>10,}  {shown}")
+            print(f"total: {checked:,} entradas a {checked / (time.perf_counter() - t):,.0f} ent/s")
+            rnd += 1
+            if time.perf_counter() >= deadline:
+                break
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
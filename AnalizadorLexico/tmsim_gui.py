@@ -2,106 +2,2269 @@
 from tkinter import ttk, messagebox
 from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, Set, List
+from typing import Dict, Set, List, Union, Iterable, Iterator, Tuple, FrozenSet, Mapping
+from types import MappingProxyType
+from array import array
+import copy
+import hashlib
+import time
+import mmap
+import os
+import tempfile
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from itertools import groupby, islice, repeat
+from operator import neg
 
 # Constantes y clases base
 BLANK = '_'
 EPSILON = 'ε'
 
+# Entrada aceptada por load_input: texto, un búfer de bytes (un símbolo latin-1 por
+# byte) o la ruta (os.PathLike) de un archivo que se mapea en memoria de solo lectura.
+TapeInput = Union[str, bytes, bytearray, memoryview, os.PathLike]
+
 class Direction(Enum):
     L = 'L'
     R = 'R'
     S = 'S'
 
+# Los move() comparan por identidad con estos alias: leer Direction.L pasa por la
+# metaclase de Enum en cada paso.
+_LEFT, _RIGHT = Direction.L, Direction.R
+
 @dataclass(frozen=True)
 class Transition:
     write: str
     move: Direction
     next_state: str
 
+_CHUNK_BITS = 8
+_CHUNK = 1 << _CHUNK_BITS
+_CHUNK_MASK = _CHUNK - 1
+_MISSING = object()
+# Marca de celda vacía en los bloques densos de ChunkedCells.
+_ABSENT = '\x00'
+
+class ChunkedCells:
+    # Mapeo índice -> símbolo repartido en bloques de 2**_CHUNK_BITS celdas. Un bloque
+    # es un dict o, si sólo guarda símbolos de un carácter, un str denso del tamaño del
+    # bloque con _ABSENT en las celdas vacías: así cargar, exportar o reescribir un
+    # bloque entero son operaciones de cadenas en C. fork() comparte los bloques en
+    # O(1); cada copia duplica un bloque dict (y el índice de bloques) sólo la primera
+    # vez que escribe en él; los str son inmutables y no hace falta copiarlos.
+    __slots__ = ("chunks", "_own_index", "_owned", "_len")
+
+    def __init__(self):
+        self.chunks: Dict[int, Union[Dict[int, str], str]] = {}
+        self._own_index = True
+        self._owned: Set[int] = set()
+        self._len = 0
+
+    def fork(self) -> "ChunkedCells":
+        other = ChunkedCells.__new__(ChunkedCells)
+        other.chunks = self.chunks
+        other._own_index = False
+        other._owned = set()
+        other._len = self._len
+        self._own_index = False
+        self._owned = set()
+        return other
+
+    def _own(self):
+        if not self._own_index:
+            self.chunks = dict(self.chunks)
+            self._own_index = True
+
+    def _writable(self, key: int) -> Dict[int, str]:
+        self._own()
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = {}
+            self._owned.add(key)
+        elif type(chunk) is str:
+            base = key << _CHUNK_BITS
+            chunk = self.chunks[key] = {i: c for i, c in zip(range(base, base + _CHUNK), chunk)
+                                        if c != _ABSENT}
+            self._owned.add(key)
+        elif key not in self._owned:
+            chunk = self.chunks[key] = dict(chunk)
+            self._owned.add(key)
+        return chunk
+
+    def load(self, s: str):
+        self.clear()
+        if _ABSENT in s:
+            for a in range(0, len(s), _CHUNK):
+                self.chunks[a >> _CHUNK_BITS] = dict(zip(range(a, a + _CHUNK), s[a:a + _CHUNK]))
+                self._owned.add(a >> _CHUNK_BITS)
+        else:
+            for a in range(0, len(s), _CHUNK):
+                self.chunks[a >> _CHUNK_BITS] = s[a:a + _CHUNK].ljust(_CHUNK, _ABSENT)
+        self._len = len(s)
+
+    def get(self, i: int, default=None):
+        chunk = self.chunks.get(i >> _CHUNK_BITS)
+        if chunk is None:
+            return default
+        if type(chunk) is str:
+            c = chunk[i & _CHUNK_MASK]
+            return default if c == _ABSENT else c
+        return chunk.get(i, default)
+
+    def __getitem__(self, i: int) -> str:
+        c = self.get(i, _MISSING)
+        if c is _MISSING:
+            raise KeyError(i)
+        return c
+
+    def __contains__(self, i: int) -> bool:
+        return self.get(i, _MISSING) is not _MISSING
+
+    def __setitem__(self, i: int, c: str):
+        # Un bloque en _owned ya es un dict propio (y el índice también): no hay que
+        # pasar por _writable.
+        key = i >> _CHUNK_BITS
+        chunk = self.chunks[key] if key in self._owned else self._writable(key)
+        if i not in chunk:
+            self._len += 1
+        chunk[i] = c
+
+    def pop(self, i: int, default=None):
+        if i not in self:
+            return default
+        key = i >> _CHUNK_BITS
+        chunk = self._writable(key)
+        self._len -= 1
+        c = chunk.pop(i)
+        if not chunk:
+            del self.chunks[key]
+            self._owned.discard(key)
+        return c
+
+    def clear(self):
+        self.chunks = {}
+        self._own_index = True
+        self._owned = set()
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[int]:
+        for i, _ in self.items():
+            yield i
+
+    def keys(self) -> Iterator[int]:
+        return iter(self)
+
+    def items(self):
+        for key, chunk in self.chunks.items():
+            if type(chunk) is str:
+                base = key << _CHUNK_BITS
+                yield from ((base + k, c) for k, c in enumerate(chunk) if c != _ABSENT)
+            else:
+                yield from chunk.items()
+
+    def text(self, lo: int, hi: int, blank: str) -> str:
+        # Celdas lo..hi como texto, con `blank` en las vacías.
+        parts = []
+        a = lo
+        while a <= hi:
+            b = min(hi + 1, ((a >> _CHUNK_BITS) + 1) << _CHUNK_BITS)
+            chunk = self.chunks.get(a >> _CHUNK_BITS)
+            if chunk is None:
+                parts.append(blank * (b - a))
+            elif type(chunk) is str:
+                k = a & _CHUNK_MASK
+                parts.append(chunk[k:k + b - a].replace(_ABSENT, blank))
+            else:
+                parts.append(''.join(map(chunk.get, range(a, b), repeat(blank, b - a))))
+            a = b
+        return ''.join(parts)
+
+    def overlay(self, lo: int, under: str) -> str:
+        # `under` (que empieza en la celda lo) con las celdas guardadas encima.
+        parts = []
+        hi = lo + len(under) - 1
+        a = lo
+        while a <= hi:
+            b = min(hi + 1, ((a >> _CHUNK_BITS) + 1) << _CHUNK_BITS)
+            chunk = self.chunks.get(a >> _CHUNK_BITS)
+            below = under[a - lo:b - lo]
+            if chunk is None:
+                parts.append(below)
+            elif type(chunk) is str:
+                k = a & _CHUNK_MASK
+                seg = chunk[k:k + b - a]
+                if _ABSENT in seg:
+                    seg = ''.join(u if c == _ABSENT else c for c, u in zip(seg, below))
+                parts.append(seg)
+            else:
+                parts.append(''.join(map(chunk.get, range(a, b), below)))
+            a = b
+        return ''.join(parts)
+
+    def _count(self, key: int) -> int:
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            return 0
+        if type(chunk) is str:
+            return _CHUNK - chunk.count(_ABSENT)
+        return len(chunk)
+
+    def assign(self, a: int, syms, blank: str | None):
+        # Reescribe de una vez las celdas [a, a + len(syms)), todas del mismo bloque. Con
+        # `blank`, esas celdas blancas se borran en lugar de guardarse.
+        key = a >> _CHUNK_BITS
+        if type(syms) is not str and all(len(c) == 1 for c in syms):
+            syms = ''.join(syms)
+        if type(syms) is str and _ABSENT not in syms:
+            block = syms if blank is None else syms.replace(blank, _ABSENT)
+            if len(block) < _CHUNK:
+                current = self.text(key << _CHUNK_BITS, ((key + 1) << _CHUNK_BITS) - 1, _ABSENT)
+                if len(current) == _CHUNK:
+                    k = a & _CHUNK_MASK
+                    block = current[:k] + block + current[k + len(block):]
+            if len(block) == _CHUNK:
+                self._own()
+                self._len -= self._count(key)
+                self._owned.discard(key)
+                if block.count(_ABSENT) == _CHUNK:
+                    self.chunks.pop(key, None)
+                else:
+                    self.chunks[key] = block
+                    self._len += self._count(key)
+                return
+        b = a + len(syms)
+        old = self._writable(key)
+        if blank is not None and blank in syms:
+            new = {i: c for i, c in zip(range(a, b), syms) if c != blank}
+        else:
+            new = dict(zip(range(a, b), syms))
+        if b - a < _CHUNK:
+            for i, c in old.items():
+                if not a <= i < b:
+                    new[i] = c
+        self._len += len(new) - len(old)
+        if new:
+            self.chunks[key] = new
+        else:
+            del self.chunks[key]
+            self._owned.discard(key)
+
 class Tape:
     def __init__(self, blank: str = BLANK):
-        self.cells: Dict[int, str] = {}
+        self.cells = ChunkedCells()
         self.head: int = 0
         self.blank: str = blank
+        # Extremos ocupados (celda no blanca más a la izquierda/derecha), o None si vacía.
+        self._lo: int | None = None
+        self._hi: int | None = None
 
     def reset(self, s: str):
-        self.cells.clear()
+        self.cells.load(s)
         self.head = 0
-        for i, ch in enumerate(s):
-            self.cells[i] = ch
+        if s:
+            self._lo, self._hi = 0, len(s) - 1
+        else:
+            self._lo = self._hi = None
 
     def read(self) -> str:
-        return self.cells.get(self.head, self.blank)
+        # Atajo para el caso común de step(): el bloque de la cabeza ya es un dict.
+        h = self.head
+        chunk = self.cells.chunks.get(h >> _CHUNK_BITS)
+        if type(chunk) is dict:
+            return chunk.get(h, self.blank)
+        return self.cells.get(h, self.blank)
 
     def write(self, c: str):
+        h = self.head
         if c == self.blank:
-            self.cells.pop(self.head, None)
+            if self.cells.pop(h, None) is not None and (h == self._lo or h == self._hi):
+                self._shrink_bounds()
         else:
-            self.cells[self.head] = c
+            # Mismo atajo que ChunkedCells.__setitem__, sin la llamada.
+            cells = self.cells
+            key = h >> _CHUNK_BITS
+            if key in cells._owned:
+                chunk = cells.chunks[key]
+                if h not in chunk:
+                    cells._len += 1
+                chunk[h] = c
+            else:
+                cells[h] = c
+            lo = self._lo
+            if lo is None:
+                self._lo = self._hi = h
+            elif h < lo:
+                self._lo = h
+            elif h > self._hi:
+                self._hi = h
 
     def move(self, d: Direction):
-        if d == Direction.L:
+        if d is _LEFT:
             self.head -= 1
-        elif d == Direction.R:
+        elif d is _RIGHT:
             self.head += 1
 
+    def _shrink_bounds(self):
+        cells = self.cells
+        if not cells:
+            self._lo = self._hi = None
+            return
+        # Se camina hacia adentro desde el extremo vaciado; si el hueco es mayor
+        # que las celdas ocupadas resulta más barato recalcular con min/max.
+        budget = len(cells)
+        lo, hi = self._lo, self._hi
+        while lo not in cells and budget:
+            lo += 1
+            budget -= 1
+        while hi not in cells and budget:
+            hi -= 1
+            budget -= 1
+        if lo not in cells or hi not in cells:
+            lo, hi = min(cells), max(cells)
+        self._lo, self._hi = lo, hi
+
+    def symbol_at(self, i: int) -> str:
+        return self.cells.get(i, self.blank)
+
+    def snapshot(self) -> "Tape":
+        # Copia en O(1): ambas cintas comparten los bloques hasta que alguna escribe.
+        snap = copy.copy(self)
+        snap.cells = self.cells.fork()
+        return snap
+
+    def export_codes(self, lo: int, hi: int) -> bytearray:
+        # Celdas lo..hi como códigos de símbolo (ver Execution.run).
+        return encode_symbols(self.cells.text(lo, hi, self.blank))
+
+    def import_codes(self, lo: int, old, new):
+        # Vuelca las celdas [lo, lo + len(new)) que cambiaron respecto de `old`, bloque
+        # a bloque; los bloques sin cambios no se tocan.
+        end = lo + len(new)
+        a = lo
+        while a < end:
+            b = min(end, ((a >> _CHUNK_BITS) + 1) << _CHUNK_BITS)
+            seg = new[a - lo:b - lo]
+            if seg != old[a - lo:b - lo]:
+                self._store_block(a, self._symbols(a, seg))
+            a = b
+        self._refresh_bounds(lo, new)
+
+    def _symbols(self, a: int, seg):
+        # Decodifica `seg`; las celdas FOREIGN conservan su símbolo original (ninguna
+        # máquina puede escribir FOREIGN, así que no cambiaron).
+        syms = decode_symbols(seg)
+        if FOREIGN not in seg:
+            return syms
+        syms = list(syms)
+        for k, code in enumerate(seg):
+            if code == FOREIGN:
+                syms[k] = self.symbol_at(a + k)
+        return syms
+
+    def _store_block(self, a: int, syms):
+        self.cells.assign(a, syms, self.blank)
+
+    def _refresh_bounds(self, lo: int, new):
+        hi = lo + len(new) - 1
+        body = new.lstrip(b"\0")
+        lo_out = self._lo if self._lo is not None and self._lo < lo else None
+        hi_out = self._hi if self._hi is not None and self._hi > hi else None
+        if body.rstrip(b"\0"):
+            first = lo + len(new) - len(body)
+            last = hi - (len(body) - len(body.rstrip(b"\0")))
+            self._lo = first if lo_out is None else lo_out
+            self._hi = last if hi_out is None else hi_out
+        elif lo_out is None and hi_out is None:
+            self._lo = self._hi = None
+        elif lo_out is None or hi_out is None:
+            # La ventana quedó en blanco y sólo hay símbolos a un lado: se recalcula.
+            cells = self.cells
+            self._lo, self._hi = (min(cells), max(cells)) if cells else (None, None)
+
+    def occupied_bounds(self):
+        if self._lo is None:
+            return None
+        return self._lo, self._hi
+
     def window_bounds(self, radius: int = 12):
-        if not self.cells:
+        occ = self.occupied_bounds()
+        if occ is None:
             left = self.head - radius
             right = self.head + radius
         else:
-            left = min(min(self.cells.keys()), self.head - radius)
-            right = max(max(self.cells.keys()), self.head + radius)
+            left = min(occ[0], self.head - radius)
+            right = max(occ[1], self.head + radius)
         return left, right
 
-class TuringMachine:
-    def __init__(self,
-                 states: Set[str],
-                 start: str,
-                 accept: Set[str],
-                 reject: Set[str],
-                 delta: Dict[str, Dict[str, Transition]],
-                 tape: Tape):
-        self.states = states
-        self.start_state = start
-        self.accept_states = accept
-        self.reject_states = reject
-        self.delta = delta
-        self.tape = tape
-        self.current_state = start
+# Codificación compacta de símbolos: 0 es el blanco, los ASCII conservan su código
+# y los que aparecen en alguna máquina (p. ej. EPSILON) se internan a partir de 128.
+# Cualquier otro símbolo de una entrada se codifica como FOREIGN, que no tiene
+# transiciones: la máquina lo rechaza igual que step() con un símbolo desconocido.
+# Eso incluye el NUL de la entrada, que no puede compartir código con el blanco. Las
+# cintas compactas guardan aparte el símbolo original de esas celdas.
+FOREIGN = 255
+FOREIGN_SYMBOL = '\ufffd'
+_SYM_DECODE: List[str] = [chr(i) for i in range(128)] + [FOREIGN_SYMBOL] * 128
+_SYM_DECODE[0] = BLANK
+_SYM_ENCODE: Dict[str, int] = {BLANK: 0}
+_ASCII_TO_CODE = bytes.maketrans(BLANK.encode('ascii') + b'\x00', b'\x00\xff')
+# Para str.translate: cada símbolo de un carácter a chr(código), de modo que el
+# resultado se codifica en latin-1 de una vez. Los caracteres por encima de 255 sin
+# internar no están y hacen fallar esa codificación (ver encode_symbols).
+_SYM_TRANSLATE: Dict[int, int] = {ord(BLANK): 0, 0: FOREIGN}
+_SYM_TRANSLATE.update((c, FOREIGN) for c in range(128, 256))
+# Inversa para decode_symbols.
+_CODE_TRANSLATE: Dict[int, str] = {0: BLANK, FOREIGN: FOREIGN_SYMBOL}
+# (símbolo, chr(código)) de los símbolos internados de un carácter. Mientras ninguno
+# esté entre U+0080 y U+00FF, codificar y decodificar se reduce a unos pocos
+# str.replace, mucho más rápidos que translate con un dict.
+_SYM_WIDE: List[Tuple[str, str]] = []
+_sym_latin = False
+
+_SYM_LOCK = threading.Lock()
+_sym_next = 128
+
+def intern_symbol(c: str) -> int:
+    # Sólo para símbolos de máquinas (ver MachineSpec); las entradas usan symbol_code.
+    global _sym_next, _sym_latin
+    code = _SYM_ENCODE.get(c)
+    if code is not None:
+        return code
+    # Internar un símbolo nuevo modifica tablas globales compartidas entre hilos.
+    with _SYM_LOCK:
+        code = _SYM_ENCODE.get(c)
+        if code is not None:
+            return code
+        if len(c) == 1 and 0 < ord(c) < 128:
+            code = ord(c)
+        else:
+            code = _sym_next
+            if code >= FOREIGN:
+                raise ValueError(f"demasiados símbolos distintos para una cinta compacta: {c!r}")
+            _SYM_DECODE[code] = c
+            _sym_next += 1
+            _CODE_TRANSLATE[code] = c
+            if len(c) == 1:
+                _SYM_TRANSLATE[ord(c)] = code
+                _SYM_WIDE.append((c, chr(code)))
+                _sym_latin |= ord(c) < 256
+        _SYM_ENCODE[c] = code
+        return code
+
+def symbol_code(c: str) -> int:
+    code = _SYM_ENCODE.get(c)
+    if code is not None:
+        return code
+    return ord(c) if len(c) == 1 and 0 < ord(c) < 128 else FOREIGN
+
+def symbol_of(code: int) -> str:
+    return _SYM_DECODE[code]
+
+def encode_symbols(s: str) -> bytearray:
+    if s.isascii():
+        return bytearray(s.encode('ascii').translate(_ASCII_TO_CODE))
+    if not _sym_latin:
+        wide = [(sym, ch) for sym, ch in _SYM_WIDE if sym in s]
+        rest = s
+        for sym, _ in wide:
+            rest = rest.replace(sym, '')
+        if rest.isascii():
+            for sym, ch in wide:
+                s = s.replace(sym, ch)
+            return bytearray(s.encode('latin-1').translate(_ASCII_TO_CODE))
+    try:
+        return bytearray(s.translate(_SYM_TRANSLATE).encode('latin-1'))
+    except UnicodeEncodeError:
+        return bytearray(symbol_code(ch) for ch in s)
+
+intern_symbol(EPSILON)
+
+def _foreign_cells(codes, s: str, base: int = 0) -> Dict[int, str]:
+    # Símbolo original de cada celda que `codes` (s codificada, desde la celda base)
+    # guarda como FOREIGN.
+    out = {}
+    k = codes.find(FOREIGN)
+    while k >= 0:
+        out[base + k] = s[k]
+        k = codes.find(FOREIGN, k + 1)
+    return out
+
+def _first_symbol(buf: bytearray) -> int:
+    # Índice del primer código no blanco de buf (que termina en uno no blanco). Se
+    # mira un prefijo cada vez mayor, así que cuesta lo que el hueco, no lo que buf.
+    n = 64
+    while True:
+        rest = buf[:n].lstrip(b"\0")
+        if rest or n >= len(buf):
+            return min(n, len(buf)) - len(rest)
+        n *= 4
+
+class ArrayTape:
+    # Cinta contigua: `right` guarda las celdas 0, 1, 2, ... y `left` las -1, -2, ...
+    # `foreign` guarda el símbolo original de las celdas FOREIGN (ninguna máquina las
+    # escribe, así que run() no las cambia).
+    def __init__(self):
+        self.right = bytearray()
+        self.left = bytearray()
+        self.foreign: Dict[int, str] = {}
+        self.head: int = 0
+        self.blank: str = BLANK
+
+    def reset(self, s: str):
+        self.right = encode_symbols(s)
+        self.left = bytearray()
+        self.foreign = _foreign_cells(self.right, s)
+        self.head = 0
+        self._trim()
+
+    def symbol_at(self, i: int) -> str:
+        if i >= 0:
+            buf, k = self.right, i
+        else:
+            buf, k = self.left, -i - 1
+        if k >= len(buf):
+            return self.blank
+        code = buf[k]
+        return self.foreign.get(i, FOREIGN_SYMBOL) if code == FOREIGN else _SYM_DECODE[code]
+
+    def read(self) -> str:
+        return self.symbol_at(self.head)
+
+    def write(self, c: str):
+        code = symbol_code(c)
+        i = self.head
+        if code == FOREIGN:
+            self.foreign[i] = c
+        elif self.foreign:
+            self.foreign.pop(i, None)
+        if i >= 0:
+            buf = self.right
+        else:
+            buf, i = self.left, -i - 1
+        n = len(buf)
+        if i < n:
+            buf[i] = code
+            if code == 0 and i == n - 1:
+                self._trim()
+        elif code != 0:
+            buf.extend(bytes(i - n))
+            buf.append(code)
+
+    def move(self, d: Direction):
+        if d is _LEFT:
+            self.head -= 1
+        elif d is _RIGHT:
+            self.head += 1
+
+    def _trim(self):
+        for buf in (self.right, self.left):
+            n = len(buf)
+            while n and buf[n - 1] == 0:
+                n -= 1
+            del buf[n:]
+
+    def snapshot(self) -> "ArrayTape":
+        snap = copy.copy(self)
+        snap.right, snap.left = bytearray(self.right), bytearray(self.left)
+        snap.foreign = dict(self.foreign)
+        return snap
+
+    def occupied_bounds(self):
+        # _trim deja no blancos los extremos lejanos; si una mitad está vacía, el extremo
+        # de ese lado se busca desde la celda 0 en la otra.
+        left, right = self.left, self.right
+        if not left and not right:
+            return None
+        lo = -len(left) if left else _first_symbol(right)
+        hi = len(right) - 1 if right else -1 - _first_symbol(left)
+        return lo, hi
+
+    def window_bounds(self, radius: int = 12):
+        occ = self.occupied_bounds()
+        if occ is None:
+            return self.head - radius, self.head + radius
+        return min(occ[0], self.head - radius), max(occ[1], self.head + radius)
+
+class PagedTape:
+    # Cinta paginada: páginas de `page_size` códigos de símbolo. Las páginas calientes
+    # viven en memoria (LRU) sin superar `memory_budget` bytes; las frías se vuelcan
+    # a un archivo temporal y se recargan bajo demanda.
+    def __init__(self, page_size: int = 4096, memory_budget: int = 1 << 20,
+                 spill_dir: str | None = None):
+        if page_size <= 0:
+            raise ValueError("page_size debe ser positivo")
+        self.page_size = page_size
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.head: int = 0
+        self.blank: str = BLANK
+        self.pages: "OrderedDict[int, bytearray]" = OrderedDict()
+        # Como en ArrayTape, el símbolo original de las celdas FOREIGN.
+        self.foreign: Dict[int, str] = {}
+        self._dirty: Set[int] = set()
+        self._offsets: Dict[int, int] = {}
+        self._spill = None
+        self._spill_end = 0
+        self._cur_no: int | None = None
+        self._cur: bytearray | None = None
+        # Extensión escrita: se amplía con cada símbolo no blanco y no se reduce al
+        # borrar, para no tener que releer páginas volcadas a disco.
+        self._lo: int | None = None
+        self._hi: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self.spills = 0
+        self.loads = 0
+
+    @property
+    def max_pages(self) -> int:
+        return max(1, self.memory_budget // self.page_size)
+
+    @property
+    def resident_bytes(self) -> int:
+        return len(self.pages) * self.page_size
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_budget": self.memory_budget,
+            "resident_bytes": self.resident_bytes,
+            "spilled_pages": len(self._offsets),
+            "hits": self.hits,
+            "misses": self.misses,
+            "spills": self.spills,
+            "loads": self.loads,
+        }
+
+    def reset(self, s: str):
+        self.pages.clear()
+        self._dirty.clear()
+        self._offsets.clear()
+        self._spill_end = 0
+        if self._spill is not None:
+            self._spill.truncate(0)
+        self._cur_no = self._cur = None
+        self.foreign = {}
+        self.head = 0
+        ps = self.page_size
+        for n, start in enumerate(range(0, len(s), ps)):
+            page = self._page(n)
+            chunk = encode_symbols(s[start:start + ps])
+            page[:len(chunk)] = chunk
+            self._dirty.add(n)
+            if FOREIGN in chunk:
+                self.foreign.update(_foreign_cells(chunk, s[start:start + ps], start))
+        if s:
+            self._lo, self._hi = 0, len(s) - 1
+        else:
+            self._lo = self._hi = None
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def snapshot(self) -> "PagedTape":
+        # Copia independiente con su propio archivo de volcado. Las páginas pasan de una
+        # en una (las volcadas se leen sin cargarlas aquí), así que la copia tampoco
+        # supera `memory_budget`; las residentes van al final y siguen residentes.
+        snap = PagedTape(self.page_size, self.memory_budget, self.spill_dir)
+        snap.head, snap.blank, snap._lo, snap._hi = self.head, self.blank, self._lo, self._hi
+        snap.foreign = dict(self.foreign)
+        for n, off in self._offsets.items():
+            if n not in self.pages:
+                self._spill.seek(off)
+                snap._adopt(n, bytearray(self._spill.read(self.page_size)))
+        for n, page in self.pages.items():
+            snap._adopt(n, bytearray(page))
+        return snap
+
+    def _adopt(self, n: int, page: bytearray):
+        self.pages[n] = page
+        self._dirty.add(n)
+        self._evict()
+
+    def _page(self, n: int) -> bytearray:
+        if n == self._cur_no:
+            self.hits += 1
+            return self._cur
+        page = self.pages.get(n)
+        if page is not None:
+            self.hits += 1
+            self.pages.move_to_end(n)
+        else:
+            self.misses += 1
+            off = self._offsets.get(n)
+            if off is None:
+                page = bytearray(self.page_size)
+            else:
+                self._spill.seek(off)
+                page = bytearray(self._spill.read(self.page_size))
+                self.loads += 1
+            self.pages[n] = page
+            self._evict()
+        self._cur_no, self._cur = n, page
+        return page
+
+    def _evict(self):
+        pages = self.pages
+        while len(pages) > self.max_pages:
+            n, page = pages.popitem(last=False)
+            if n not in self._dirty:
+                continue
+            self._dirty.discard(n)
+            if self._spill is None:
+                self._spill = tempfile.TemporaryFile(dir=self.spill_dir)
+            off = self._offsets.get(n)
+            if off is None:
+                off = self._offsets[n] = self._spill_end
+                self._spill_end += self.page_size
+            self._spill.seek(off)
+            self._spill.write(page)
+            self.spills += 1
+
+    def symbol_at(self, i: int) -> str:
+        n, off = divmod(i, self.page_size)
+        if n != self._cur_no and n not in self.pages and n not in self._offsets:
+            return self.blank
+        code = self._page(n)[off]
+        return self.foreign.get(i, FOREIGN_SYMBOL) if code == FOREIGN else _SYM_DECODE[code]
+
+    def read(self) -> str:
+        return self.symbol_at(self.head)
+
+    def write(self, c: str):
+        code = symbol_code(c)
+        h = self.head
+        if code == FOREIGN:
+            self.foreign[h] = c
+        elif self.foreign:
+            self.foreign.pop(h, None)
+        n, off = divmod(h, self.page_size)
+        if code == 0 and n != self._cur_no and n not in self.pages and n not in self._offsets:
+            return
+        self._page(n)[off] = code
+        self._dirty.add(n)
+        if code:
+            if self._lo is None:
+                self._lo = self._hi = h
+            elif h < self._lo:
+                self._lo = h
+            elif h > self._hi:
+                self._hi = h
+
+    def move(self, d: Direction):
+        if d is _LEFT:
+            self.head -= 1
+        elif d is _RIGHT:
+            self.head += 1
+
+    def _has_page(self, n: int) -> bool:
+        return n == self._cur_no or n in self.pages or n in self._offsets
+
+    def export_codes(self, lo: int, hi: int) -> bytearray:
+        out = bytearray()
+        ps = self.page_size
+        a = lo
+        while a <= hi:
+            n, off = divmod(a, ps)
+            b = min(hi + 1, (n + 1) * ps)
+            if self._has_page(n):
+                out += self._page(n)[off:off + b - a]
+            else:
+                out += bytes(b - a)
+            a = b
+        return out
+
+    def import_codes(self, lo: int, old, new):
+        ps = self.page_size
+        end = lo + len(new)
+        a = lo
+        while a < end:
+            n, off = divmod(a, ps)
+            b = min(end, (n + 1) * ps)
+            seg = new[a - lo:b - lo]
+            if seg != old[a - lo:b - lo]:
+                self._page(n)[off:off + len(seg)] = seg
+                self._dirty.add(n)
+                body = seg.strip(b"\0")
+                if body:
+                    first = a + len(seg) - len(seg.lstrip(b"\0"))
+                    last = first + len(body) - 1
+                    self._lo = first if self._lo is None else min(self._lo, first)
+                    self._hi = last if self._hi is None else max(self._hi, last)
+            a = b
+
+    def occupied_bounds(self):
+        if self._lo is None:
+            return None
+        return self._lo, self._hi
+
+    def window_bounds(self, radius: int = 12):
+        occ = self.occupied_bounds()
+        if occ is None:
+            return self.head - radius, self.head + radius
+        return min(occ[0], self.head - radius), max(occ[1], self.head + radius)
+
+class RLETape:
+    # Cinta comprimida por rachas, guardadas como un búfer con hueco en torno al
+    # cabezal: `_ls`/`_ly` son el inicio y el símbolo de las rachas a la izquierda del
+    # hueco (en orden) y `_rs`/`_ry` los de las rachas a su derecha, en orden inverso.
+    # Cada racha llega hasta el inicio de la siguiente; la última termina en `end`, y
+    # fuera de ese rango todo es blanco. Las escrituras junto al cabezal sólo añaden o
+    # quitan elementos del final de las listas (O(1)); mover el hueco cuesta una
+    # operación por racha recorrida, y las consultas sin escribir no lo mueven.
+    def __init__(self, blank: str = BLANK):
+        self._ls: List[int] = []
+        self._ly: List[str] = []
+        self._rs: List[int] = []
+        self._ry: List[str] = []
+        self.end: int = 0
+        self.head: int = 0
+        self.blank: str = blank
+
+    def reset(self, s: str):
+        starts: List[int] = []
+        syms: List[str] = []
+        pos = 0
+        for ch, grp in groupby(s):
+            starts.append(pos)
+            syms.append(ch)
+            pos += sum(1 for _ in grp)
+        # El cabezal empieza en 0: todas las rachas quedan a la derecha del hueco.
+        self._ls, self._ly = [], []
+        self._rs, self._ry = starts[::-1], syms[::-1]
+        self.end = pos
+        self.head = 0
+        self._trim()
+
+    def __len__(self) -> int:
+        return len(self._ls) + len(self._rs)
+
+    def snapshot(self) -> "RLETape":
+        snap = copy.copy(self)
+        snap._ls, snap._ly = list(self._ls), list(self._ly)
+        snap._rs, snap._ry = list(self._rs), list(self._ry)
+        return snap
+
+    def _first(self) -> int:
+        return self._ls[0] if self._ls else self._rs[-1]
+
+    def run_at(self, i: int) -> Tuple[int | None, int | None, str]:
+        # (inicio, fin, símbolo) de la racha que contiene i. Fuera de la cinta cubierta
+        # el blanco no tiene límite por ese lado (None).
+        ls, rs = self._ls, self._rs
+        if not ls and not rs:
+            return None, None, self.blank
+        first = self._first()
+        if i < first:
+            return None, first, self.blank
+        if i >= self.end:
+            return self.end, None, self.blank
+        if rs and i >= rs[-1]:
+            # `_rs` está en orden decreciente: la primera racha que empieza en i o antes.
+            j = bisect_left(rs, -i, key=neg)
+            return rs[j], rs[j - 1] if j else self.end, self._ry[j]
+        k = bisect_right(ls, i) - 1
+        if k + 1 < len(ls):
+            hi = ls[k + 1]
+        else:
+            hi = rs[-1] if rs else self.end
+        return ls[k], hi, self._ly[k]
+
+    def symbol_at(self, i: int) -> str:
+        return self.run_at(i)[2]
+
+    def read(self) -> str:
+        return self.symbol_at(self.head)
+
+    def write(self, c: str):
+        if self.symbol_at(self.head) != c:
+            self.fill(self.head, self.head + 1, c)
+
+    def _focus(self, i: int):
+        # Mueve el hueco para que a su izquierda queden justo las rachas que empiezan
+        # en i o antes.
+        ls, ly, rs, ry = self._ls, self._ly, self._rs, self._ry
+        while ls and ls[-1] > i:
+            rs.append(ls.pop())
+            ry.append(ly.pop())
+        while rs and rs[-1] <= i:
+            ls.append(rs.pop())
+            ly.append(ry.pop())
+
+    def fill(self, lo: int, hi: int, c: str):
+        # Escribe `c` en todas las celdas [lo, hi) como una sola racha. Tras mover el
+        # hueco a `lo` sólo se tocan los extremos de las listas.
+        if lo >= hi:
+            return
+        ls, ly, rs, ry = self._ls, self._ly, self._rs, self._ry
+        if hi == lo + 1 and c != self.blank and rs and ls:
+            # Caso frecuente: la celda está junto al hueco y la racha vecina ya tiene `c`
+            # (p. ej. el cabezal avanza marcando con EPSILON); sólo se mueve la frontera.
+            if rs[-1] == lo and ly[-1] == c:
+                if (rs[-2] if len(rs) > 1 else self.end) > hi:
+                    rs[-1] = hi
+                else:
+                    rs.pop()
+                    ry.pop()
+                    if ry and ry[-1] == c:
+                        rs.pop()
+                        ry.pop()
+                return
+            if rs[-1] == hi and ry[-1] == c and ls[-1] <= lo:
+                if ls[-1] < lo:
+                    rs[-1] = lo
+                else:
+                    ls.pop()
+                    ly.pop()
+                    if ly and ly[-1] == c:
+                        rs[-1] = ls.pop()
+                        ly.pop()
+                    else:
+                        rs[-1] = lo
+                return
+        if not ls and not rs:
+            if c != self.blank:
+                self._ls, self._ly, self.end = [lo], [c], hi
+            return
+        after = self.symbol_at(hi)
+        end = self.end
+        self._focus(lo)
+        ls, ly, rs, ry = self._ls, self._ly, self._rs, self._ry
+        if ls and ls[-1] == lo:
+            ls.pop()
+            ly.pop()
+        while rs and rs[-1] <= hi:
+            rs.pop()
+            ry.pop()
+        if ls and lo > end:
+            ls.append(end)
+            ly.append(self.blank)
+        ls.append(lo)
+        ly.append(c)
+        if hi < end:
+            rs.append(hi)
+            ry.append(after)
+        self.end = max(end, hi)
+        # Sólo pueden haber quedado juntas dos rachas iguales a ambos lados de la nueva.
+        if rs and ry[-1] == c:
+            rs.pop()
+            ry.pop()
+        if len(ls) > 1 and ly[-2] == c:
+            ls.pop()
+            ly.pop()
+        self._trim()
+
+    def _trim(self):
+        # Quita los blancos de los extremos; la nueva racha sólo puede haber dejado uno
+        # en cada extremo.
+        ls, ly, rs, ry = self._ls, self._ly, self._rs, self._ry
+        if not rs:
+            while ly and ly[-1] == self.blank:
+                self.end = ls.pop()
+                ly.pop()
+        elif ry[0] == self.blank:
+            self.end = rs.pop(0)
+            ry.pop(0)
+        if ly and ly[0] == self.blank:
+            del ls[0], ly[0]
+        if not ls:
+            while ry and ry[-1] == self.blank:
+                rs.pop()
+                ry.pop()
+        if not ls and not rs:
+            self.end = 0
+
+    def move(self, d: Direction):
+        if d is _LEFT:
+            self.head -= 1
+        elif d is _RIGHT:
+            self.head += 1
+
+    def runs(self, left: int, right: int):
+        # Rachas (inicio, longitud, símbolo) que cubren [left, right], incluidos los
+        # tramos blancos fuera de la cinta cubierta.
+        pos = left
+        while pos <= right:
+            _, hi, sym = self.run_at(pos)
+            stop = right + 1 if hi is None else min(hi, right + 1)
+            yield pos, stop - pos, sym
+            pos = stop
+
+    def occupied_bounds(self):
+        if not self._ls and not self._rs:
+            return None
+        return self._first(), self.end - 1
+
+    def window_bounds(self, radius: int = 12):
+        occ = self.occupied_bounds()
+        if occ is None:
+            return self.head - radius, self.head + radius
+        return min(occ[0], self.head - radius), max(occ[1], self.head + radius)
+
+def tape_window(tape, left: int, right: int) -> List[str]:
+    runs = getattr(tape, "runs", None)
+    if runs is None:
+        return [tape.symbol_at(i) for i in range(left, right + 1)]
+    out: List[str] = []
+    for _, length, ch in runs(left, right):
+        out.extend([ch] * length)
+    return out
+
+_BYTE_SYMBOLS: List[str] = [chr(i) for i in range(256)]
+
+def _changed_span(old, new) -> Tuple[int, int]:
+    # Tramo [f, l) fuera del cual `old` y `new` (de igual longitud y distintos)
+    # coinciden; se compara por trozos para no recorrer byte a byte lo que no cambió.
+    f = 0
+    while old[f:f + 256] == new[f:f + 256]:
+        f += 256
+    while old[f] == new[f]:
+        f += 1
+    l = len(new)
+    while l - 256 >= f and old[l - 256:l] == new[l - 256:l]:
+        l -= 256
+    while old[l - 1] == new[l - 1]:
+        l -= 1
+    return f, l
+
+class BufferTape(Tape):
+    # Lee la entrada directamente del búfer original (str, bytes, memoryview o mmap).
+    # Las escrituras dentro de la entrada quedan en `overlay`, una RLETape cuyo blanco
+    # es None (celda no escrita): la parte ya consumida, una sola racha de EPSILON,
+    # ocupa O(1) sea cual sea el tamaño de la entrada. Las de fuera van a `cells`.
+    def __init__(self, blank: str = BLANK):
+        super().__init__(blank)
+        self.source: Union[str, memoryview] = ""
+        self.overlay = RLETape(None)
+        self._mmap: mmap.mmap | None = None
+
+    def reset(self, s: TapeInput):
+        self.close()
+        if isinstance(s, os.PathLike):
+            with open(s, "rb") as f:
+                if os.fstat(f.fileno()).st_size:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            src = memoryview(self._mmap) if self._mmap is not None else ""
+        elif isinstance(s, str):
+            src = s
+        else:
+            src = memoryview(s)
+            if src.format != 'B' or src.ndim != 1:
+                src = src.cast('B')
+        self.cells.clear()
+        self.overlay = RLETape(None)
+        self.head = 0
+        self._lo = self._hi = None
+        self.source = src
+
+    def snapshot(self) -> "BufferTape":
+        # La instantánea comparte el búfer de entrada con una vista propia, que mantiene
+        # vivo el mapeo aunque la cinta original se cierre o se reinicie.
+        snap = super().snapshot()
+        snap.overlay = self.overlay.snapshot()
+        snap._mmap = None
+        if isinstance(self.source, memoryview):
+            snap.source = self.source[:]
+        return snap
+
+    def close(self):
+        src, mm = self.source, self._mmap
+        self.source = ""
+        self._mmap = None
+        if isinstance(src, memoryview):
+            src.release()
+        if mm is not None:
+            try:
+                mm.close()
+            except BufferError:
+                # Alguna instantánea conserva una vista: el mapeo se libera con la última.
+                pass
+
+    def export_codes(self, lo: int, hi: int) -> bytearray:
+        # Sólo se copia el tramo lo..hi del búfer de entrada, racha a racha de `overlay`.
+        src = self.source
+        a, b = max(lo, 0), min(hi + 1, len(src))
+        parts = [self.blank * max(0, min(a, hi + 1) - lo)]
+        if a < b:
+            for start, length, sym in self.overlay.runs(a, b - 1):
+                if sym is not None:
+                    parts.append(sym * length)
+                elif isinstance(src, str):
+                    parts.append(src[start:start + length])
+                else:
+                    parts.append(src[start:start + length].tobytes().decode('latin-1'))
+        parts.append(self.blank * max(0, hi + 1 - max(b, lo)))
+        under = ''.join(parts)
+        return encode_symbols(self.cells.overlay(lo, under) if self.cells else under)
+
+    def import_codes(self, lo: int, old, new):
+        # Dentro de la entrada sólo se vuelca a `overlay` el tramo que cambió, por rachas.
+        end = lo + len(new)
+        a, b = max(lo, 0), min(end, len(self.source))
+        if a < b and old[a - lo:b - lo] != new[a - lo:b - lo]:
+            f, l = _changed_span(old[a - lo:b - lo], new[a - lo:b - lo])
+            pos = a + f
+            for ch, grp in groupby(self._symbols(pos, new[pos - lo:a + l - lo])):
+                k = len(list(grp))
+                self.overlay.fill(pos, pos + k, ch)
+                pos += k
+        # Fuera de la entrada, como Tape.
+        if lo < 0:
+            m = min(end, 0) - lo
+            super().import_codes(lo, old[:m], new[:m])
+        if end > len(self.source):
+            m = max(lo, len(self.source)) - lo
+            super().import_codes(lo + m, old[m:], new[m:])
+
+    def _store_block(self, a: int, syms):
+        # Sólo fuera de la entrada (ver import_codes); celda a celda para mantener los
+        # extremos ocupados.
+        head = self.head
+        for i, c in enumerate(syms, a):
+            self.head = i
+            self.write(c)
+        self.head = head
+
+    def _refresh_bounds(self, lo: int, new):
+        # write() ya mantiene los extremos fuera de la entrada.
+        pass
+
+    def symbol_at(self, i: int) -> str:
+        src = self.source
+        if 0 <= i < len(src):
+            c = self.overlay.symbol_at(i)
+            if c is not None:
+                return c
+            c = src[i]
+            return c if isinstance(c, str) else _BYTE_SYMBOLS[c]
+        return self.cells.get(i, self.blank)
+
+    def read(self) -> str:
+        return self.symbol_at(self.head)
+
+    def write(self, c: str):
+        if 0 <= self.head < len(self.source):
+            # Dentro de la entrada el blanco también se guarda para ocultar el búfer.
+            self.overlay.head = self.head
+            self.overlay.write(c)
+        else:
+            super().write(c)
+
+    def occupied_bounds(self):
+        n = len(self.source)
+        if self._lo is None:
+            return (0, n - 1) if n else None
+        if not n:
+            return self._lo, self._hi
+        return min(0, self._lo), max(n - 1, self._hi)
+
+# Entradas de la tabla compilada: (siguiente << 11) | MACRO | (movimiento + 1) << 8 | escritura.
+# MACRO marca los bucles sobre el mismo estado que se desplazan, que execute() resuelve
+# saltando de una vez toda la racha de celdas que siguen en el bucle.
+_MOVE_DELTA = {Direction.L: -1, Direction.S: 0, Direction.R: 1}
+MACRO = 1 << 10
+NO_TRANSITION = -1
+HALTED = -2
+# Celdas por ventana cuando Execution.run no ejecuta sobre la cinta entera: la primera
+# cubre la parte escrita (al menos _RUN_WINDOW_MIN celdas) y cada vez que el cabezal
+# sale de ella la siguiente dobla su tamaño, hasta _RUN_WINDOW.
+_RUN_WINDOW = 1 << 16
+_RUN_WINDOW_MIN = 256
+
+# Banderas de las entradas de DFAEngine.table; por debajo de _DFA_FLAGS la entrada es
+# directamente el siguiente estado.
+_DFA_HALT = 1 << 16
+_DFA_STAY = 1 << 17
+_DFA_NOSTEP = 1 << 18
+_DFA_STUCK = 1 << 19
+_DFA_FLAGS = _DFA_HALT
+
+@dataclass(frozen=True, eq=False)
+class DFAEngine:
+    # Máquina de sólo lectura y movimiento a la derecha ejecutada como AFD: recorre
+    # la entrada codificada sin cinta. `tails` resume, para cada estado, lo que hace
+    # la máquina al leer blancos tras el final: (estado final, pasos, avance). `rep`
+    # da el estado de la máquina original que representa cada estado del AFD.
+    table: array
+    start: int
+    tails: Tuple[Tuple[int, int, int], ...]
+    rep: Tuple[int, ...]
+
+    @classmethod
+    def from_compiled(cls, cm: "CompiledMachine") -> "DFAEngine | None":
+        # Devuelve None si la máquina no es equivalente a un AFD: algún paso mueve a la
+        # izquierda, se queda quieto sin detenerse o recorre blancos sin terminar.
+        n = len(cm.states)
+        table = array('q', [0]) * (n << 8)
+        for i in range(n):
+            if cm.halting[i]:
+                # Sólo se llega aquí si el estado inicial ya es de parada: sin pasos.
+                table[i << 8:(i + 1) << 8] = array('q', [i | _DFA_HALT | _DFA_NOSTEP]) * 256
+                continue
+            for c in range(256):
+                e = cm.table[(i << 8) | c]
+                if e == NO_TRANSITION:
+                    table[(i << 8) | c] = (cm.fail | _DFA_HALT | _DFA_NOSTEP) if cm.fail >= 0 else _DFA_STUCK
+                    continue
+                nxt, move = e >> 11, (e >> 8) & 3
+                if move == 0 or (move == 1 and not cm.halting[nxt]):
+                    return None
+                flags = (_DFA_HALT if cm.halting[nxt] else 0) | (_DFA_STAY if move == 1 else 0)
+                table[(i << 8) | c] = nxt | flags
+        tails = []
+        for i in range(n):
+            state, steps, seen = i, 0, set()
+            while not cm.halting[state]:
+                if state in seen:
+                    return None
+                seen.add(state)
+                e = table[state << 8]
+                if e & _DFA_STUCK:
+                    break
+                if not e & _DFA_NOSTEP:
+                    steps += 1
+                state = e & 0xFFFF
+                if e & _DFA_HALT:
+                    break
+            head = steps - (1 if e & _DFA_STAY else 0) if steps else 0
+            tails.append((state, steps, head))
+        return cls(table, cm.start, tuple(tails), tuple(range(n)))
+
+    def minimized(self) -> "DFAEngine":
+        # Algoritmo de Hopcroft sobre los estados alcanzables. Dos estados sólo se funden
+        # si con cada símbolo se detienen igual (estado de parada y banderas) o pasan a
+        # bloques equivalentes, y si tratan igual los blancos del final (`tails`), así
+        # que pasos, cabezal y estado final no cambian. Un estado con entradas STUCK
+        # devuelve su propio nombre, de modo que nunca se funde con otro.
+        table, rep = self.table, self.rep
+        live, stack = {self.start}, [self.start]
+        while stack:
+            s = stack.pop()
+            for c in range(256):
+                e = table[(s << 8) | c]
+                if e < _DFA_FLAGS and e not in live:
+                    live.add(e)
+                    stack.append(e)
+        order = sorted(live)
+        # Los códigos con la misma columna en todos los estados vivos son indistinguibles.
+        columns: Dict[Tuple[int, ...], int] = {}
+        for c in range(256):
+            columns.setdefault(tuple(table[(s << 8) | c] for s in order), c)
+        symbols = list(columns.values())
+        initial: Dict[tuple, Set[int]] = {}
+        inverse: Dict[int, Dict[int, List[int]]] = {c: {} for c in symbols}
+        for s in order:
+            row = [table[(s << 8) | c] for c in symbols]
+            stuck = rep[s] if any(e & _DFA_STUCK for e in row) else -1
+            exits = tuple(e if e >= _DFA_FLAGS else -1 for e in row)
+            initial.setdefault((exits, self.tails[s], stuck), set()).add(s)
+            for c, e in zip(symbols, row):
+                if e < _DFA_FLAGS:
+                    inverse[c].setdefault(e, []).append(s)
+        blocks = list(initial.values())
+        block_of = {s: b for b, members in enumerate(blocks) for s in members}
+        pending = set(range(len(blocks)))
+        while pending:
+            splitter = list(blocks[pending.pop()])
+            for c in symbols:
+                inv = inverse[c]
+                touched: Dict[int, Set[int]] = {}
+                for t in splitter:
+                    for s in inv.get(t, ()):
+                        touched.setdefault(block_of[s], set()).add(s)
+                for b, hit in touched.items():
+                    members = blocks[b]
+                    if len(hit) == len(members):
+                        continue
+                    members -= hit
+                    nb = len(blocks)
+                    blocks.append(hit)
+                    for s in hit:
+                        block_of[s] = nb
+                    pending.add(nb if b in pending or len(hit) <= len(members) else b)
+        # Numeración estable: el bloque del estado inicial primero y el resto por su
+        # menor estado, que además hace de representante.
+        reps = sorted((min(members) for members in blocks), key=lambda r: (r != self.start, r))
+        index = {block_of[r]: k for k, r in enumerate(reps)}
+        out = array('q', [0]) * (len(reps) << 8)
+        for k, r in enumerate(reps):
+            for c in range(256):
+                e = table[(r << 8) | c]
+                out[(k << 8) | c] = e if e >= _DFA_FLAGS else index[block_of[e]]
+        return DFAEngine(out, 0, tuple(self.tails[r] for r in reps), tuple(rep[r] for r in reps))
+
+    def scan(self, data) -> Tuple[int, int, int]:
+        # Devuelve (estado, pasos, cabezal) con los mismos valores que el bucle de step().
+        return self.scan_stream((data,))
+
+    def scan_stream(self, chunks) -> Tuple[int, int, int]:
+        # Como scan, pero la entrada llega en trozos codificados que se descartan al
+        # consumirlos, así que la memoria no depende de la longitud total.
+        table = self.table
+        s = self.start
+        offset = 0
+        for data in chunks:
+            for i, c in enumerate(data):
+                e = table[(s << 8) | c]
+                if e >= _DFA_FLAGS:
+                    i += offset
+                    if e & _DFA_STUCK:
+                        return self.rep[s], i, i
+                    if e & _DFA_NOSTEP:
+                        return e & 0xFFFF, i, i
+                    return e & 0xFFFF, i + 1, i if e & _DFA_STAY else i + 1
+                s = e
+            offset += len(data)
+        state, steps, head = self.tails[s]
+        return state, offset + steps, offset + head
+
+    def walk(self, data, i: int, trail: List[int]) -> Tuple[int, int, int] | None:
+        # Avanza desde data[i] en el estado trail[-1], añadiendo a `trail` el estado tras
+        # cada símbolo. Devuelve (estado, pasos, cabezal) si se detiene antes del final
+        # de la entrada, o None si la consume entera (ver finish).
+        table = self.table
+        s = trail[-1]
+        for j in range(i, len(data)):
+            e = table[(s << 8) | data[j]]
+            if e >= _DFA_FLAGS:
+                if e & _DFA_STUCK:
+                    return self.rep[s], j, j
+                if e & _DFA_NOSTEP:
+                    return e & 0xFFFF, j, j
+                return e & 0xFFFF, j + 1, j if e & _DFA_STAY else j + 1
+            s = e
+            trail.append(s)
+        return None
+
+    def finish(self, state: int, length: int) -> Tuple[int, int, int]:
+        # Resultado al agotar una entrada de `length` símbolos en `state`.
+        final, steps, head = self.tails[state]
+        return final, length + steps, length + head
+
+@dataclass(frozen=True, eq=False)
+class CompiledMachine:
+    # Máquina con estados internados como enteros y delta aplanada en una tabla de
+    # 256 columnas (una por código de símbolo de cinta, ver symbol_code).
+    states: Tuple[str, ...]
+    start: int
+    halting: bytes
+    fail: int
+    table: array
+    loops_right: Tuple[bytes, ...]
+    loops_left: Tuple[bytes, ...]
+
+    @property
+    def dfa(self) -> DFAEngine | None:
+        try:
+            return self.__dict__["_dfa"]
+        except KeyError:
+            # Se guarda ya minimizado: es el que usan todos los caminos rápidos.
+            engine = DFAEngine.from_compiled(self)
+            if engine is not None:
+                engine = engine.minimized()
+            object.__setattr__(self, "_dfa", engine)
+            return engine
+
+    @classmethod
+    def from_spec(cls, spec: "MachineSpec") -> "CompiledMachine":
+        order = [spec.start] + sorted(spec.states - {spec.start})
+        index = {q: i for i, q in enumerate(order)}
+        mark = symbol_code(EPSILON)
+        table = array('q', [NO_TRANSITION]) * (len(order) << 8)
+        halting = bytearray(len(order))
+        loops = {Direction.L: [b""] * len(order), Direction.R: [b""] * len(order)}
+        for q, i in index.items():
+            if q in spec.accept:
+                halting[i] = 1
+            elif q in spec.reject:
+                halting[i] = 2
+            if halting[i]:
+                table[i << 8:(i + 1) << 8] = array('q', [HALTED]) * 256
+                continue
+            for sym, t in spec.delta.get(q, {}).items():
+                code = intern_symbol(sym)
+                # step() marca cada celda leída con EPSILON, no con t.write.
+                e = (index[t.next_state] << 11) | ((_MOVE_DELTA[t.move] + 1) << 8) | mark
+                if t.next_state == q and t.move != Direction.S:
+                    e |= MACRO
+                    loops[t.move][i] += bytes((code,))
+                table[(i << 8) | code] = e
+        fail = index[next(iter(spec.reject))] if spec.reject else -1
+        return cls(tuple(order), 0, bytes(halting), fail, table,
+                   tuple(loops[Direction.R]), tuple(loops[Direction.L]))
+
+    def status_of(self, state: int) -> str:
+        return ("RUNNING", "ACCEPT", "REJECT")[self.halting[state]]
+
+    def execute(self, buf: bytearray, pos: int = 0, state: int | None = None,
+                max_steps: int | None = None, macro: bool = True,
+                bounded: bool = False) -> Tuple[int, int, int, int]:
+        # Ejecuta sobre una cinta de códigos; devuelve (estado, pasos, posición,
+        # celdas añadidas a la izquierda de `buf`). Cada celda saltada por un
+        # macro-paso cuenta como un paso, igual que con step(). Con `bounded`, `buf`
+        # es una ventana de una cinta mayor: en lugar de crecer, se detiene en cuanto
+        # el cabezal sale de ella.
+        table = self.table
+        fail = self.fail
+        loops_right = self.loops_right
+        loops_left = self.loops_left
+        if state is None:
+            state = self.start
+        limit = -1 if max_steps is None else max_steps
+        n = len(buf)
+        shift = 0
+        steps = 0
+        while steps != limit:
+            if pos >= n:
+                if bounded:
+                    break
+                buf.extend(bytes(pos - n + 64))
+                n = len(buf)
+            elif pos < 0:
+                if bounded:
+                    break
+                grow = max(64, n, -pos)
+                buf[0:0] = bytes(grow)
+                pos += grow
+                shift += grow
+                n += grow
+            e = table[(state << 8) | buf[pos]]
+            if e < 0:
+                if e == NO_TRANSITION and fail >= 0:
+                    state = fail
+                break
+            if e & MACRO and macro:
+                left = -1 if limit < 0 else limit - steps
+                if e & 0x300 == 0x200:
+                    end = _skip_right(buf, pos, n if left < 0 else min(n, pos + left),
+                                      loops_right[state])
+                    buf[pos:end] = bytes((e & 0xFF,)) * (end - pos)
+                    steps += end - pos
+                    pos = end
+                else:
+                    start = _skip_left(buf, pos + 1, 0 if left < 0 else max(0, pos + 1 - left),
+                                       loops_left[state])
+                    buf[start:pos + 1] = bytes((e & 0xFF,)) * (pos + 1 - start)
+                    steps += pos + 1 - start
+                    pos = start - 1
+                continue
+            buf[pos] = e & 0xFF
+            pos += ((e >> 8) & 3) - 1
+            state = e >> 11
+            steps += 1
+        return state, steps, pos, shift
+
+    def execute_detect(self, buf: bytearray, pos: int = 0, state: int | None = None,
+                       max_steps: int | None = None, deadline: float | None = None):
+        # Como execute, pero detecta configuraciones repetidas. Devuelve (estado, pasos,
+        # posición, desplazamiento, ciclo, agotó_tiempo), con ciclo = (longitud, paso
+        # de entrada) o None.
+        if state is None:
+            state = self.start
+        origin = (bytes(buf), pos, state)
+        runner = _ZRunner(self, buf, pos, state)
+        detector = LoopDetector(runner.hash, runner.config())
+        limit = -1 if max_steps is None else max_steps
+        steps = 0
+        cycle = None
+        timed_out = False
+        while steps != limit:
+            if not runner.step():
+                break
+            steps += 1
+            if detector.observe(runner.hash, runner.config):
+                lam = detector.cycle_length
+                mu = _cycle_start(lambda: _ZRunner(self, bytearray(origin[0]), origin[1], origin[2]), lam)
+                cycle = (lam, mu)
+                break
+            if deadline is not None and not steps & 0xFFFF and time.monotonic() >= deadline:
+                timed_out = True
+                break
+        return runner.state, steps, runner.pos, runner.base, cycle, timed_out
+
+def _skip_right(buf: bytearray, pos: int, stop: int, syms: bytes) -> int:
+    # Primer índice en [pos, stop) cuyo símbolo no está en `syms` (o stop), buscando
+    # en ventanas que se duplican para no copiar más allá de la racha.
+    k = 64
+    while pos < stop:
+        seg = buf[pos:min(pos + k, stop)]
+        rest = len(seg.lstrip(syms))
+        pos += len(seg) - rest
+        if rest:
+            break
+        k <<= 1
+    return pos
+
+def _skip_left(buf: bytearray, end: int, stop: int, syms: bytes) -> int:
+    # Análogo a _skip_right hacia la izquierda: inicio de la racha que termina en end.
+    k = 64
+    while end > stop:
+        seg = buf[max(stop, end - k):end]
+        rest = len(seg.rstrip(syms))
+        end -= len(seg) - rest
+        if rest:
+            break
+        k <<= 1
+    return end
+
+# Detección de bucles: hash de Zobrist incremental de la configuración (estado,
+# cabezal, cinta) y algoritmo de Brent. Las claves de Zobrist se derivan con
+# splitmix64 en lugar de tablas, porque la cinta no tiene tamaño acotado; el
+# blanco aporta 0, así que extender la cinta con blancos no cambia el hash.
+_MASK64 = (1 << 64) - 1
+_Z_CELL = 0x5bd1e9955bd1e995
+_Z_HEAD = 0x2545f4914f6cdd1d
+_Z_STATE = 0x9e3779b97f4a7c15
+
+def _mix64(x: int) -> int:
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+def _z_cell(i: int, code: int) -> int:
+    return _mix64((((i & _MASK64) << 8) | code) ^ _Z_CELL) if code else 0
+
+def _z_head(i: int) -> int:
+    return _mix64((i & _MASK64) ^ _Z_HEAD)
+
+def _z_state(q) -> int:
+    return _mix64((hash(q) & _MASK64) ^ _Z_STATE)
+
+class LoopDetector:
+    # Brent: guarda una configuración en cada potencia de dos y compara contra ella.
+    # La configuración completa sólo se materializa en esos puntos (coste amortizado
+    # O(1) por paso) y confirma cualquier coincidencia de hash.
+    def __init__(self, h: int, config):
+        self.saved_hash = h
+        self.saved_config = config
+        self.power = 1
+        self.lam = 0
+        self.cycle_length: int | None = None
+
+    def observe(self, h: int, config_fn) -> bool:
+        self.lam += 1
+        if h == self.saved_hash and config_fn() == self.saved_config:
+            self.cycle_length = self.lam
+            return True
+        if self.lam == self.power:
+            self.saved_hash = h
+            self.saved_config = config_fn()
+            self.power <<= 1
+            self.lam = 0
+        return False
+
+def _cycle_start(make_runner, cycle_length: int) -> int:
+    # Segunda fase de Brent: un puntero adelantado `cycle_length` pasos y otro desde
+    # el origen avanzan juntos; el primer encuentro es el paso de entrada al ciclo.
+    a = make_runner()
+    b = make_runner()
+    for _ in range(cycle_length):
+        b.step()
+    mu = 0
+    while not (a.hash == b.hash and a.config() == b.config()):
+        a.step()
+        b.step()
+        mu += 1
+    return mu
+
+class _ZRunner:
+    # Ejecuta la tabla compilada paso a paso (sin macro-pasos) manteniendo el hash.
+    def __init__(self, cm: CompiledMachine, buf: bytearray, pos: int, state: int):
+        self.cm = cm
+        self.buf = buf
+        self.base = 0
+        self.pos = pos
+        self.state = state
+        h = _z_state(state) ^ _z_head(pos)
+        for i, c in enumerate(buf):
+            h ^= _z_cell(i, c)
+        self.hash = h
+
+    def step(self) -> bool:
+        buf, pos = self.buf, self.pos
+        if pos >= len(buf):
+            buf.extend(bytes(pos - len(buf) + 64))
+        elif pos < 0:
+            grow = max(64, len(buf), -pos)
+            buf[0:0] = bytes(grow)
+            pos += grow
+            self.base += grow
+        self.pos = pos
+        e = self.cm.table[(self.state << 8) | buf[pos]]
+        if e < 0:
+            if e == NO_TRANSITION and self.cm.fail >= 0:
+                self.hash ^= _z_state(self.state) ^ _z_state(self.cm.fail)
+                self.state = self.cm.fail
+            return False
+        i = pos - self.base
+        old, new = buf[pos], e & 0xFF
+        nxt = e >> 11
+        mv = ((e >> 8) & 3) - 1
+        buf[pos] = new
+        self.hash ^= (_z_cell(i, old) ^ _z_cell(i, new) ^ _z_state(self.state) ^ _z_state(nxt)
+                      ^ _z_head(i) ^ _z_head(i + mv))
+        self.state = nxt
+        self.pos = pos + mv
+        return True
+
+    def config(self):
+        stripped = bytes(self.buf).lstrip(b"\x00")
+        first = len(self.buf) - len(stripped) - self.base
+        return self.state, self.pos - self.base, first, stripped.rstrip(b"\x00")
+
+def encode_input(s: Union[str, bytes, bytearray, memoryview]) -> bytearray:
+    if isinstance(s, str):
+        return encode_symbols(s)
+    data = bytes(s)
+    if data.isascii():
+        return bytearray(data.translate(_ASCII_TO_CODE))
+    return encode_symbols(data.decode('latin-1'))
+
+def decode_symbols(buf) -> str:
+    # Inversa de encode_symbols: el blanco es 0 y los códigos >= 128 son internados.
+    data = bytes(buf)
+    text = data.decode('latin-1')
+    if data.isascii():
+        return text.replace('\x00', BLANK)
+    if _sym_latin:
+        return text.translate(_CODE_TRANSLATE)
+    text = text.replace('\x00', BLANK).replace(chr(FOREIGN), FOREIGN_SYMBOL)
+    for sym, ch in _SYM_WIDE:
+        if ch in text:
+            text = text.replace(ch, sym)
+    return text
+
+@dataclass(frozen=True)
+class RunResult:
+    status: str
+    steps: int
+    head: int
+    state: str
+    # Sólo con status "LOOPS": longitud del ciclo y paso en el que se entra en él.
+    cycle_length: int | None = None
+    cycle_start: int | None = None
+
+@dataclass(frozen=True)
+class MachineSpec:
+    # Definición inmutable y hashable de una máquina; se comparte entre ejecuciones
+    # e hilos. `transitions` guarda delta como tuplas (estado, símbolo, transición).
+    states: FrozenSet[str]
+    start: str
+    accept: FrozenSet[str]
+    reject: FrozenSet[str]
+    transitions: Tuple[Tuple[str, str, Transition], ...]
+
+    def __post_init__(self):
+        # Los símbolos de la máquina se internan al definirla, antes de codificar
+        # cualquier entrada: así un símbolo suyo nunca llega a codificarse como FOREIGN.
+        for _, sym, t in self.transitions:
+            intern_symbol(sym)
+            intern_symbol(t.write)
+
+    # Las cachés (_delta, _step_table, _compiled, _fingerprint) no viajan con pickle ni deepcopy: se
+    # reconstruyen bajo demanda, y al restaurar se vuelven a internar los símbolos por si
+    # la copia llega a otro proceso.
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__post_init__()
+
+    @classmethod
+    def from_delta(cls, states: Set[str], start: str, accept: Set[str], reject: Set[str],
+                   delta: Dict[str, Dict[str, Transition]]) -> "MachineSpec":
+        items = sorted(((q, sym, t) for q, row in delta.items() for sym, t in row.items()),
+                       key=lambda x: (x[0], x[1]))
+        return cls(frozenset(states), start, frozenset(accept), frozenset(reject), tuple(items))
+
+    def _cached(self, name: str, build):
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            value = build()
+            object.__setattr__(self, name, value)
+            return value
+
+    @property
+    def delta(self) -> Mapping[str, Mapping[str, Transition]]:
+        def build():
+            rows = self.step_table()[0]
+            return MappingProxyType({q: MappingProxyType(row) for q, row in rows.items()})
+        return self._cached("_delta", build)
+
+    def step_table(self) -> Tuple[Dict[str, Dict[str, Transition]], FrozenSet[str]]:
+        # delta en dicts simples (los que envuelve `delta`) y los estados finales juntos:
+        # lo que consulta Execution.step() en cada paso, sin pasar por los proxies.
+        def build():
+            rows: Dict[str, Dict[str, Transition]] = {q: {} for q in self.states}
+            for q, sym, t in self.transitions:
+                rows.setdefault(q, {})[sym] = t
+            return rows, self.accept | self.reject
+        return self._cached("_step_table", build)
+
+    def compile(self) -> CompiledMachine:
+        return self._cached("_compiled", lambda: CompiledMachine.from_spec(self))
+
+    @property
+    def fingerprint(self) -> str:
+        # Hash canónico (estable entre procesos, a diferencia de hash()) de la definición.
+        def build():
+            h = hashlib.sha256()
+            parts = [self.start, ",".join(sorted(self.states)), ",".join(sorted(self.accept)),
+                     ",".join(sorted(self.reject))]
+            parts += [f"{q}\x1f{sym}\x1f{t.write}\x1f{t.move.value}\x1f{t.next_state}"
+                      for q, sym, t in self.transitions]
+            h.update("\x1e".join(parts).encode("utf-8"))
+            return h.hexdigest()
+        return self._cached("_fingerprint", build)
+
+    def execution(self, tape=None) -> "Execution":
+        return Execution(self, tape)
+
+    def evaluate(self, s: Union[str, bytes, bytearray, memoryview],
+                 max_steps: int | None = None, detect_loops: bool = False) -> RunResult:
+        # Ejecuta `s` desde el estado inicial sin cinta propia. Si la máquina es
+        # equivalente a un AFD (que siempre termina) se recorre la entrada sin cinta.
+        cm = self.compile()
+        data = encode_input(s)
+        dfa = cm.dfa
+        if dfa is not None:
+            state, steps, head = dfa.scan(data)
+        elif detect_loops:
+            state, steps, pos, shift, cycle, _ = cm.execute_detect(data, max_steps=max_steps)
+            head = pos - shift
+            if cycle is not None:
+                return RunResult("LOOPS", steps, head, cm.states[state], *cycle)
+        else:
+            state, steps, pos, shift = cm.execute(data, max_steps=max_steps)
+            head = pos - shift
+        status = cm.status_of(state)
+        if status == "RUNNING":
+            status = "LIMIT" if max_steps is not None and steps >= max_steps else "STUCK"
+        return RunResult(status, steps, head, cm.states[state])
+
+    def evaluate_stream(self, source, chunk_size: int = 1 << 16) -> RunResult:
+        # Evalúa una entrada que llega de un archivo (texto o binario) o de un iterador
+        # de símbolos o trozos, sin guardarla entera. Sólo para máquinas equivalentes a
+        # un AFD: nunca vuelven sobre una celda ya leída, así que no hace falta cinta.
+        cm = self.compile()
+        dfa = cm.dfa
+        if dfa is None:
+            raise ValueError("el modo streaming requiere una máquina de sólo lectura "
+                             "que se mueva a la derecha")
+        state, steps, head = dfa.scan_stream(_stream_chunks(source, chunk_size))
+        status = cm.status_of(state)
+        return RunResult("STUCK" if status == "RUNNING" else status, steps, head, cm.states[state])
+
+def _stream_chunks(source, size: int) -> Iterator[bytearray]:
+    read = getattr(source, "read", None)
+    if read is not None:
+        while True:
+            chunk = read(size)
+            if not chunk:
+                return
+            yield encode_input(chunk)
+    it = iter(source)
+    while True:
+        part = list(islice(it, size))
+        if not part:
+            return
+        yield encode_input(''.join(part) if isinstance(part[0], str) else b''.join(part))
+
+class Execution:
+    # Estado de una ejecución: referencia a la especificación compartida, cinta propia
+    # y estado actual. Crear una es O(1); `_table` guarda MachineSpec.step_table() desde
+    # el primer step().
+    __slots__ = ("spec", "tape", "current_state", "_table")
+
+    def __init__(self, spec: MachineSpec, tape=None):
+        self.spec = spec
+        self.tape = tape if tape is not None else Tape()
+        self.current_state = spec.start
+        self._table = None
+
+    def compile(self) -> CompiledMachine:
+        return self.spec.compile()
 
     def reset(self):
-        self.current_state = self.start_state
+        self.current_state = self.spec.start
 
-    def load_input(self, s: str):
+    def load_input(self, s: TapeInput):
+        if not isinstance(s, str) and not isinstance(self.tape, BufferTape):
+            self.tape = BufferTape(self.tape.blank)
         self.tape.reset(s)
         self.reset()
 
+    def snapshot(self):
+        return self.current_state, self.tape.snapshot()
+
+    def restore(self, snap):
+        state, tape = snap
+        self.current_state = state
+        self.tape = tape.snapshot()
+
+    def run(self, max_steps: int | None = None, timeout: float | None = None,
+            detect_loops: bool = False) -> RunResult:
+        # Ejecuta hasta detenerse sobre la tabla compilada. Estados finales posibles:
+        # ACCEPT, REJECT, LIMIT (max_steps), TIMEOUT, STUCK (sin transición ni rechazo)
+        # o, con detect_loops, LOOPS si la configuración se repite.
+        cm = self.compile()
+        state = cm.states.index(self.current_state)
+        tape = self.tape
+        deadline = None if timeout is None else time.monotonic() + timeout
+        steps = 0
+        timed_out = False
+        cycle = None
+        if detect_loops:
+            # Las configuraciones se comparan enteras, así que aquí la cinta se exporta
+            # completa.
+            buf, base = self._export_tape()
+            old = bytes(buf)
+            state, steps, pos, shift, cycle, timed_out = cm.execute_detect(
+                buf, tape.head + base, state, max_steps, deadline)
+            self._import_tape(buf, base + shift, bytes(shift) + old + bytes(len(buf) - shift - len(old)))
+            tape.head = pos - base - shift
+        elif isinstance(tape, RLETape):
+            state, steps, timed_out = self._run_rle(cm, state, max_steps, deadline)
+        elif isinstance(tape, ArrayTape):
+            buf, base = self._export_tape()
+            pos = tape.head + base
+            while True:
+                chunk = None if deadline is None else 1 << 16
+                if max_steps is not None:
+                    chunk = max_steps - steps if chunk is None else min(chunk, max_steps - steps)
+                state, n, pos, shift = cm.execute(buf, pos, state, chunk)
+                base += shift
+                steps += n
+                if chunk is None or n < chunk or cm.halting[state] or steps == max_steps:
+                    break
+                if time.monotonic() >= deadline:
+                    timed_out = True
+                    break
+            self._import_tape(buf, base, b"")
+            tape.head = pos - base
+        else:
+            # El resto de cintas se ejecutan por ventanas alrededor del cabezal: sólo la
+            # ventana se convierte a códigos y sólo vuelven a la cinta los bloques que
+            # cambiaron, así que la memoria no depende del tamaño de la cinta
+            # (PagedTape, BufferTape sobre mmap).
+            occ = tape.occupied_bounds()
+            span = 0 if occ is None else max(occ[1], tape.head) - min(occ[0], tape.head)
+            width = min(_RUN_WINDOW, max(_RUN_WINDOW_MIN, 2 * span + 2))
+            while True:
+                chunk = None if deadline is None else 1 << 16
+                if max_steps is not None:
+                    chunk = max_steps - steps if chunk is None else min(chunk, max_steps - steps)
+                lo = tape.head - width // 2
+                buf = self._export_range(lo, lo + width - 1)
+                old = bytes(buf)
+                state, n, pos, _ = cm.execute(buf, tape.head - lo, state, chunk, bounded=True)
+                steps += n
+                self._import_range(lo, old, buf)
+                tape.head = lo + pos
+                if cm.halting[state] or steps == max_steps:
+                    break
+                if 0 <= pos < len(buf) and (chunk is None or n < chunk):
+                    break
+                width = min(_RUN_WINDOW, 2 * width)
+                if deadline is not None and time.monotonic() >= deadline:
+                    timed_out = True
+                    break
+        self.current_state = cm.states[state]
+        status = cm.status_of(state)
+        if cycle is not None:
+            return RunResult("LOOPS", steps, tape.head, self.current_state, *cycle)
+        if status == "RUNNING":
+            if timed_out:
+                status = "TIMEOUT"
+            elif max_steps is not None and steps >= max_steps:
+                status = "LIMIT"
+            else:
+                status = "STUCK"
+        return RunResult(status, steps, tape.head, self.current_state)
+
+    def evaluate(self, s: Union[str, bytes, bytearray, memoryview],
+                 max_steps: int | None = None, detect_loops: bool = False) -> RunResult:
+        return self.spec.evaluate(s, max_steps, detect_loops)
+
+    def evaluate_stream(self, source, chunk_size: int = 1 << 16) -> RunResult:
+        return self.spec.evaluate_stream(source, chunk_size)
+
+    def _run_rle(self, cm: CompiledMachine, state: int, max_steps: int | None,
+                 deadline: float | None) -> Tuple[int, int, bool]:
+        # Ejecuta directamente sobre las rachas: un macro-paso recorre de una vez el
+        # resto de la racha bajo el cabezal y la reescribe con RLETape.fill, así que un
+        # bucle sobre una racha de n celdas cuesta O(log n) y no exporta la cinta.
+        tape = self.tape
+        table, fail = cm.table, cm.fail
+        limit = -1 if max_steps is None else max_steps
+        steps = 0
+        rounds = 0
+        while steps != limit:
+            rounds += 1
+            if deadline is not None and not rounds & 0xFFF and time.monotonic() >= deadline:
+                return state, steps, True
+            h = tape.head
+            lo, hi, sym = tape.run_at(h)
+            e = table[(state << 8) | symbol_code(sym)]
+            if e < 0:
+                if e == NO_TRANSITION and fail >= 0:
+                    state = fail
+                break
+            write = _SYM_DECODE[e & 0xFF]
+            if not e & MACRO:
+                if sym != write:
+                    tape.fill(h, h + 1, write)
+                tape.head = h + ((e >> 8) & 3) - 1
+                state = e >> 11
+                steps += 1
+                continue
+            # Celdas que quedan en la racha en el sentido del bucle; fuera de la cinta
+            # cubierta el blanco se extiende sin fin y sólo lo acota el límite de pasos.
+            right = e & 0x300 == 0x200
+            if right:
+                n = -1 if hi is None else hi - h
+            else:
+                n = -1 if lo is None else h + 1 - lo
+            if n < 0 or (limit >= 0 and n > limit - steps):
+                n = limit - steps if limit >= 0 else 1 << 20
+            if right:
+                tape.fill(h, h + n, write)
+                tape.head = h + n
+            else:
+                tape.fill(h + 1 - n, h + 1, write)
+                tape.head = h - n
+            steps += n
+        return state, steps, False
+
+    def _export_tape(self) -> Tuple[bytearray, int]:
+        # Devuelve la cinta como códigos de símbolo y el índice de buf que es la celda 0.
+        tape = self.tape
+        if isinstance(tape, ArrayTape):
+            if not tape.left:
+                return tape.right, 0
+            return tape.left[::-1] + tape.right, len(tape.left)
+        occ = tape.occupied_bounds()
+        lo, hi = (tape.head, tape.head) if occ is None else (min(occ[0], tape.head), max(occ[1], tape.head))
+        return self._export_range(lo, hi), -lo
+
+    def _import_tape(self, buf: bytearray, base: int, old):
+        # `old`: contenido de buf antes de ejecutar, alineado con buf.
+        tape = self.tape
+        if isinstance(tape, ArrayTape):
+            tape.left = buf[:base][::-1]
+            tape.right = buf[base:] if base else buf
+            tape._trim()
+            return
+        self._import_range(-base, old, buf)
+
+    def _export_range(self, lo: int, hi: int) -> bytearray:
+        export = getattr(self.tape, "export_codes", None)
+        if export is not None:
+            return export(lo, hi)
+        return encode_symbols(''.join(tape_window(self.tape, lo, hi)))
+
+    def _import_range(self, lo: int, old, buf: bytearray):
+        tape = self.tape
+        imp = getattr(tape, "import_codes", None)
+        if imp is not None:
+            imp(lo, old, buf)
+            return
+        head = tape.head
+        for k in range(0, len(buf), 256):
+            if buf[k:k + 256] == old[k:k + 256]:
+                continue
+            for i in range(k, min(k + 256, len(buf))):
+                if buf[i] != old[i]:
+                    tape.head = lo + i
+                    tape.write(_SYM_DECODE[buf[i]])
+        tape.head = head
+
     def is_halted(self) -> bool:
-        return self.current_state in self.accept_states or self.current_state in self.reject_states
+        return self.current_state in self.spec.accept or self.current_state in self.spec.reject
 
     def status(self) -> str:
-        if self.current_state in self.accept_states:
+        if self.current_state in self.spec.accept:
             return "ACCEPT"
-        if self.current_state in self.reject_states:
+        if self.current_state in self.spec.reject:
             return "REJECT"
         return "RUNNING"
 
     def step(self) -> bool:
-        if self.is_halted():
+        table = self._table
+        if table is None:
+            table = self._table = self.spec.step_table()
+        rows, halting = table
+        q = self.current_state
+        if q in halting:
             return False
-        row = self.delta.get(self.current_state, {})
-        t = row.get(self.tape.read())
+        tape = self.tape
+        row = rows.get(q)
+        t = row.get(tape.read()) if row is not None else None
         if t is None:
-            if self.reject_states:
-                self.current_state = next(iter(self.reject_states))
+            if self.spec.reject:
+                self.current_state = next(iter(self.spec.reject))
             return False
-        self.tape.write(EPSILON)
-        self.tape.move(t.move)
+        tape.write(EPSILON)
+        tape.move(t.move)
         self.current_state = t.next_state
         return True
 
+class TuringMachine(Execution):
+    def __init__(self,
+                 states: Set[str],
+                 start: str,
+                 accept: Set[str],
+                 reject: Set[str],
+                 delta: Dict[str, Dict[str, Transition]],
+                 tape: Tape):
+        super().__init__(MachineSpec.from_delta(states, start, accept, reject, delta), tape)
+
+    @classmethod
+    def from_spec(cls, spec: MachineSpec, tape=None) -> "TuringMachine":
+        # Envuelve una especificación ya construida sin volver a ordenar su delta.
+        tm = cls.__new__(cls)
+        Execution.__init__(tm, spec, tape)
+        return tm
+
+    @property
+    def states(self) -> FrozenSet[str]:
+        return self.spec.states
+
+    @property
+    def start_state(self) -> str:
+        return self.spec.start
+
+    @property
+    def accept_states(self) -> FrozenSet[str]:
+        return self.spec.accept
+
+    @property
+    def reject_states(self) -> FrozenSet[str]:
+        return self.spec.reject
+
+    @property
+    def delta(self) -> Mapping[str, Mapping[str, Transition]]:
+        return self.spec.delta
+
+class LoopWatch:
+    # Envuelve una ejecución paso a paso (la de la interfaz, por ejemplo) y detecta si
+    # entra en un ciclo, con coste O(1) amortizado por paso.
+    def __init__(self, execution: Execution, detect: bool = True):
+        self.execution = execution
+        tape = execution.tape
+        h = _z_state(execution.current_state) ^ _z_head(tape.head)
+        occ = tape.occupied_bounds()
+        if occ is not None:
+            for i, ch in enumerate(tape_window(tape, occ[0], occ[1]), start=occ[0]):
+                h ^= _z_cell(i, symbol_code(ch))
+        self.hash = h
+        self.steps = 0
+        self.cycle_length: int | None = None
+        self.cycle_start: int | None = None
+        self.origin = execution.snapshot() if detect else None
+        self.detector = LoopDetector(h, self.config()) if detect else None
+
+    @property
+    def looping(self) -> bool:
+        return self.cycle_length is not None
+
+    def config(self):
+        ex = self.execution
+        tape = ex.tape
+        occ = tape.occupied_bounds()
+        cells = "" if occ is None else ''.join(tape_window(tape, occ[0], occ[1]))
+        stripped = cells.lstrip(BLANK)
+        first = (0 if occ is None else occ[0]) + len(cells) - len(stripped)
+        return ex.current_state, tape.head, first, stripped.rstrip(BLANK)
+
+    def step(self) -> bool:
+        if self.looping:
+            return False
+        ex = self.execution
+        tape = ex.tape
+        q, i = ex.current_state, tape.head
+        old = symbol_code(tape.read())
+        moved = ex.step()
+        h = self.hash ^ _z_state(q) ^ _z_state(ex.current_state)
+        if not moved:
+            self.hash = h
+            return False
+        self.steps += 1
+        self.hash = (h ^ _z_cell(i, old) ^ _z_cell(i, symbol_code(tape.symbol_at(i)))
+                     ^ _z_head(i) ^ _z_head(tape.head))
+        if self.detector is not None and self.detector.observe(self.hash, self.config):
+            self.cycle_length = self.detector.cycle_length
+            self.cycle_start = _cycle_start(self._probe, self.cycle_length)
+        return True
+
+    def _probe(self) -> "LoopWatch":
+        ex = Execution(self.execution.spec)
+        ex.restore(self.origin)
+        return LoopWatch(ex, detect=False)
+
+def input_digest(s: Union[str, bytes, bytearray, memoryview]) -> bytes:
+    # Resumen estable de una entrada. Un str y unos bytes con la misma codificación
+    # UTF-8 no son la misma cinta (los bytes se leen como latin-1), así que el tipo
+    # entra en el resumen como personalización de BLAKE2.
+    if isinstance(s, str):
+        return hashlib.blake2b(s.encode("utf-8"), digest_size=16, person=b"str").digest()
+    return hashlib.blake2b(bytes(s), digest_size=16, person=b"bytes").digest()
+
+class ResultCache:
+    # Caché LRU de resultados de evaluate() por (huella de la máquina, entrada). Las
+    # entradas cortas se usan tal cual como clave; las largas, por su resumen BLAKE2,
+    # y cada elemento cuenta su tamaño aproximado contra `max_bytes`.
+    ENTRY_OVERHEAD = 200
+    INLINE_KEY = 64
+    # Sólo se guardan resultados que no dependen de límites de pasos o de tiempo.
+    CACHEABLE = frozenset({"ACCEPT", "REJECT", "STUCK", "LOOPS"})
+
+    def __init__(self, max_entries: int = 100_000, max_bytes: int = 32 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[Tuple[str, object], Tuple[RunResult, int]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def key(self, spec: MachineSpec, s) -> Tuple[str, object]:
+        if len(s) <= self.INLINE_KEY:
+            return spec.fingerprint, s if isinstance(s, str) else bytes(s)
+        return spec.fingerprint, input_digest(s)
+
+    def get(self, spec: MachineSpec, s, max_steps: int | None = None) -> RunResult | None:
+        return self.lookup(self.key(spec, s), max_steps)
+
+    def lookup(self, key: Tuple[str, object], max_steps: int | None = None) -> RunResult | None:
+        # get() con la clave ya calculada (p. ej. la de tmsim_store).
+        with self._lock:
+            hit = self.entries.get(key)
+            if hit is None or (max_steps is not None and hit[0].steps > max_steps):
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return hit[0]
+
+    def put(self, spec: MachineSpec, s, result: RunResult):
+        if result.status not in self.CACHEABLE:
+            return
+        self.store(self.key(spec, s), result)
+
+    def store(self, key: Tuple[str, object], result: RunResult):
+        size = self.ENTRY_OVERHEAD + len(key[1])
+        with self._lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self.entries[key] = (result, size)
+            self.bytes += size
+            while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def evaluate(self, machine: Union[MachineSpec, Execution], s,
+                 max_steps: int | None = None, detect_loops: bool = False) -> RunResult:
+        spec = machine.spec if isinstance(machine, Execution) else machine
+        result = self.get(spec, s, max_steps)
+        if result is None:
+            result = spec.evaluate(s, max_steps, detect_loops)
+            self.put(spec, s, result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def retain(self, fingerprints: Iterable[str]):
+        # Descarta los resultados de máquinas que no estén en `fingerprints`.
+        keep = set(fingerprints)
+        with self._lock:
+            for key in [k for k in self.entries if k[0] not in keep]:
+                self.bytes -= self.entries.pop(key)[1]
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self.entries), "bytes": self.bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+# Caché compartida por la interfaz y el servicio.
+RESULT_CACHE = ResultCache()
+
+# Códigos de estado de BatchResults.status (los tres primeros en el mismo orden que
+# CompiledMachine.halting; LIMIT indica que se agotó el máximo de pasos y LOOPS que se
+# detectó un ciclo).
+STATUS_NAMES = ("STUCK", "ACCEPT", "REJECT", "LIMIT", "LOOPS")
+STATUS_LIMIT = 3
+
+@dataclass(frozen=True, eq=False)
+class BatchResults:
+    # Resultados de evaluate_many en arreglos compactos, uno por entrada.
+    status: bytearray
+    steps: array
+    heads: array
+    states: array
+    state_names: Tuple[str, ...]
+
+    def __len__(self) -> int:
+        return len(self.status)
+
+    def __getitem__(self, i: int) -> RunResult:
+        return RunResult(STATUS_NAMES[self.status[i]], self.steps[i], self.heads[i],
+                         self.state_names[self.states[i]])
+
+    def accepted(self, i: int) -> bool:
+        return self.status[i] == 1
+
+def evaluate_many(machine: Union[MachineSpec, Execution], inputs,
+                  cache: ResultCache | None = None) -> BatchResults:
+    # Evalúa cada entrada desde el estado inicial con la máquina compilada una sola vez;
+    # sin AFD, todas las ejecuciones reutilizan el mismo búfer de cinta.
+    spec = machine.spec if isinstance(machine, Execution) else machine
+    cm = machine.compile()
+    dfa = cm.dfa
+    halting = cm.halting
+    status = bytearray()
+    steps = array('q')
+    heads = array('q')
+    states = array('H')
+    buf = bytearray()
+    index = {q: i for i, q in enumerate(cm.states)}
+    for s in inputs:
+        hit = cache.get(spec, s) if cache is not None else None
+        if hit is not None:
+            status.append(STATUS_NAMES.index(hit.status))
+            steps.append(hit.steps)
+            heads.append(hit.head)
+            states.append(index[hit.state])
+            continue
+        data = encode_input(s)
+        if dfa is not None:
+            state, n, head = dfa.scan(data)
+        else:
+            buf[:] = data
+            state, n, pos, shift = cm.execute(buf)
+            head = pos - shift
+        if cache is not None:
+            cache.put(spec, s, RunResult(STATUS_NAMES[halting[state]], n, head, cm.states[state]))
+        status.append(halting[state])
+        steps.append(n)
+        heads.append(head)
+        states.append(state)
+    return BatchResults(status, steps, heads, states, cm.states)
+
 def tm_one_or_more_then_any() -> TuringMachine:
     states = {"q0", "q1", "q_accept", "q_reject"}
     acc, rej = {"q_accept"}, {"q_reject"}
@@ -369,6 +2532,15 @@ REGEX_TABLE = [
     }
 ]
 
+def regex_entry(key: Union[str, int]) -> Dict:
+    # Busca una entrada de REGEX_TABLE por nombre (p. ej. "(ab)*") o por posición.
+    if isinstance(key, int):
+        return REGEX_TABLE[key]
+    for item in REGEX_TABLE:
+        if item["name"] == key:
+            return item
+    raise KeyError(f"no hay ninguna máquina llamada {key!r}")
+
 CELL_W = 26
 CELL_H = 36
 CELL_PAD = 4
@@ -381,6 +2553,7 @@ class App(tk.Tk):
         self.geometry("920x520")
         self.resizable(False, False)
         self.tm: TuringMachine | None = None
+        self.watch: LoopWatch | None = None
         self.running = False
         self.after_id = None
         self.speed_ms = 300
@@ -414,6 +2587,8 @@ class App(tk.Tk):
         self.lbl_regex.pack(side=tk.LEFT, padx=12)
         self.lbl_alphabet = ttk.Label(info, text="Σ: -")
         self.lbl_alphabet.pack(side=tk.LEFT, padx=12)
+        self.lbl_expected = ttk.Label(info, text="Resultado: -")
+        self.lbl_expected.pack(side=tk.LEFT, padx=12)
 
         self.canvas = tk.Canvas(self, width=900, height=320, bg="#101418", highlightthickness=0)
         self.canvas.pack(side=tk.TOP, pady=8)
@@ -445,10 +2620,16 @@ class App(tk.Tk):
         if self.tm is None:
             return
         s = self.entry.get().strip()
-        self.tm.load_input(s)
+        self._load_input(s)
         self._update_info_labels()
         self._redraw_tape()
 
+    def _load_input(self, s: str):
+        self.tm.load_input(s)
+        self.watch = LoopWatch(self.tm)
+        r = RESULT_CACHE.evaluate(self.tm, s, max_steps=1_000_000, detect_loops=True)
+        self.lbl_expected.config(text=f"Resultado: {r.status} en {r.steps} pasos")
+
     def on_change_regex(self):
         self._load_selected_machine()
 
@@ -461,7 +2642,7 @@ class App(tk.Tk):
         example = item["examples"][0]
         self.entry.delete(0, tk.END)
         self.entry.insert(0, example)
-        self.tm.load_input(example)
+        self._load_input(example)
         self._update_info_labels()
         self._redraw_tape()
 
@@ -482,7 +2663,7 @@ class App(tk.Tk):
         self.running = False
         if self.tm is None:
             return
-        self.tm.step()
+        self.watch.step()
         self._update_info_labels()
         self._redraw_tape()
 
@@ -491,15 +2672,15 @@ class App(tk.Tk):
         if self.tm is None:
             return
         s = self.entry.get().strip()
-        self.tm.load_input(s)
+        self._load_input(s)
         self._update_info_labels()
         self._redraw_tape()
 
     def _tick(self):
         if not self.running:
             return
-        if self.tm and not self.tm.is_halted():
-            self.tm.step()
+        if self.tm and not self.tm.is_halted() and not self.watch.looping:
+            self.watch.step()
             self._update_info_labels()
             self._redraw_tape()
             self.after_id = self.after(self.speed_ms, self._tick)
@@ -526,7 +2707,11 @@ class App(tk.Tk):
         item = REGEX_TABLE[self.combo.current()]
         st = self.tm.current_state if self.tm else "-"
         self.lbl_state.config(text=f"Estado: {st}")
-        self.lbl_status.config(text=f"Ejecución: {self.tm.status() if self.tm else '-'}")
+        if self.watch and self.watch.looping:
+            status = f"LOOPS (ciclo de {self.watch.cycle_length} pasos desde el paso {self.watch.cycle_start})"
+        else:
+            status = self.tm.status() if self.tm else '-'
+        self.lbl_status.config(text=f"Ejecución: {status}")
         self.lbl_regex.config(text=f"Regex: {item['pattern']}")
         self.lbl_alphabet.config(text=f"Σ: {item['alphabet']}")
 
@@ -537,12 +2722,11 @@ class App(tk.Tk):
         left, right = self.tm.tape.window_bounds(radius=12)
         x0 = 10
         y0 = 60
-        for i in range(left, right + 1):
+        for i, ch in enumerate(tape_window(self.tm.tape, left, right), start=left):
             x = x0 + (i - left) * (CELL_W + CELL_PAD)
             self.canvas.create_rectangle(x, y0, x + CELL_W, y0 + CELL_H,
                                          outline="#3A4250",
                                          fill="#18202A")
-            ch = self.tm.tape.cells.get(i, BLANK)
             color = "#E5E7EB" if ch != BLANK else "#6B7280"
             self.canvas.create_text(x + CELL_W / 2, y0 + CELL_H / 2, text=ch, fill=color, font=("Consolas", 14, "bold"))
             if i == self.tm.tape.head:
@@ -0,0 +1,75 @@
+﻿import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Union
+
+from tmsim_gui import (BatchResults, Execution, MachineSpec, ResultCache, TuringMachine,
+                       evaluate_many, regex_entry)
+
+# Ejecución por lotes en varios procesos o hilos. Con procesos, cada trabajador
+# construye y compila la máquina de REGEX_TABLE una sola vez; con hilos, todos
+# comparten la misma MachineSpec de sólo lectura. En ambos casos las entradas se
+# reparten en bloques grandes y los resultados conservan el orden de entrada.
+
+DEFAULT_CHUNK = 4096
+
+_worker_machine: TuringMachine | None = None
+
+def _init_worker(key: Union[str, int]):
+    global _worker_machine
+    _worker_machine = regex_entry(key)["factory"]()
+    _worker_machine.compile()
+
+def _run_chunk(chunk: List):
+    r = evaluate_many(_worker_machine, chunk)
+    # Se devuelven bytes en lugar de objetos para que el retorno se serialice barato.
+    return bytes(r.status), r.steps.tobytes(), r.heads.tobytes(), r.states.tobytes()
+
+def _chunks(inputs: Iterable, size: int) -> Iterator[List]:
+    it = iter(inputs)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def evaluate_parallel(key: Union[str, int], inputs: Iterable, workers: int | None = None,
+                      chunk_size: int = DEFAULT_CHUNK) -> BatchResults:
+    # Igual que evaluate_many(regex_entry(key)["factory"](), inputs), repartido entre
+    # `workers` procesos (por defecto, todos los núcleos); el orden se conserva.
+    state_names = regex_entry(key)["factory"]().compile().states
+    status = bytearray()
+    steps = array('q')
+    heads = array('q')
+    states = array('H')
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             initializer=_init_worker, initargs=(key,)) as ex:
+        for st, sp, hd, sq in ex.map(_run_chunk, _chunks(inputs, chunk_size)):
+            status += st
+            steps.frombytes(sp)
+            heads.frombytes(hd)
+            states.frombytes(sq)
+    return BatchResults(status, steps, heads, states, state_names)
+
+def evaluate_threaded(machine: Union[str, int, MachineSpec, Execution], inputs: Iterable,
+                      workers: int | None = None, chunk_size: int = DEFAULT_CHUNK,
+                      cache: ResultCache | None = None) -> BatchResults:
+    # Cada hilo evalúa bloques con su propia cinta sobre una única MachineSpec. Sólo da
+    # paralelismo real en CPython sin GIL (3.13t); con GIL sirve como referencia.
+    if isinstance(machine, (str, int)):
+        machine = regex_entry(machine)["factory"]()
+    spec = machine.spec if isinstance(machine, Execution) else machine
+    cm = spec.compile()
+    cm.dfa  # las cachés perezosas se llenan antes de compartir la especificación
+    status = bytearray()
+    steps = array('q')
+    heads = array('q')
+    states = array('H')
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as ex:
+        for r in ex.map(lambda chunk: evaluate_many(spec, chunk, cache), _chunks(inputs, chunk_size)):
+            status += r.status
+            steps.extend(r.steps)
+            heads.extend(r.heads)
+            states.extend(r.states)
+    return BatchResults(status, steps, heads, states, cm.states)
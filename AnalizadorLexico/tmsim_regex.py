@@ -0,0 +1,301 @@
+﻿import threading
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+from tmsim_gui import BLANK, EPSILON, Direction, MachineSpec, Transition, TuringMachine
+
+# Compilador de expresiones regulares a máquinas de Turing: AFN de Thompson ->
+# construcción de subconjuntos -> minimización de Hopcroft -> máquina que lee la
+# cadena de izquierda a derecha y decide al llegar al primer blanco.
+#
+# Sintaxis admitida (la de REGEX_TABLE): literales, \x (los de control como \n y \t;
+# no los de clase como \d o \w), [abc] y [a-z], (...) y
+# (?:...), |, *, + y ? (también perezosos: *?, +? y ??). Los anclajes ^ y $ sólo se
+# aceptan en los extremos: la máquina siempre compara la cadena completa, como
+# re.fullmatch.
+
+_SPECIAL = set("()|*+?[]\\.^${}")
+# Escapes de un carácter de control; el resto de escapes con letra o dígito (\d, \w,
+# \b, referencias...) cambiaría el lenguaje si se tomara como literal, así que se
+# rechazan. Dentro de una clase, \b es el retroceso, como en re.
+_CONTROL = {"a": "\a", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v"}
+
+class _NFA:
+    # AFN de Thompson: por estado, lista de transiciones vacías y de (símbolo, destino).
+    def __init__(self):
+        self.eps: List[List[int]] = []
+        self.edges: List[List[Tuple[str, int]]] = []
+
+    def state(self) -> int:
+        self.eps.append([])
+        self.edges.append([])
+        return len(self.eps) - 1
+
+    def closure(self, states: Iterable[int]) -> FrozenSet[int]:
+        seen = set(states)
+        stack = list(seen)
+        while stack:
+            for t in self.eps[stack.pop()]:
+                if t not in seen:
+                    seen.add(t)
+                    stack.append(t)
+        return frozenset(seen)
+
+class _Parser:
+    # Descenso recursivo que construye directamente los fragmentos (entrada, salida)
+    # del AFN de Thompson.
+    def __init__(self, pattern: str, nfa: _NFA):
+        body = pattern[1:] if pattern.startswith("^") else pattern
+        # El '$' final es un anclaje si no lo escapa un número impar de '\'.
+        if body.endswith("$") and (len(body) - 1 - len(body[:-1].rstrip("\\"))) % 2 == 0:
+            body = body[:-1]
+        self.pattern = pattern
+        self.s = body
+        self.i = 0
+        self.nfa = nfa
+        self.alphabet: Set[str] = set()
+
+    def error(self, msg: str) -> ValueError:
+        return ValueError(f"{msg} en la posición {self.i} de {self.pattern!r}")
+
+    def peek(self) -> str | None:
+        return self.s[self.i] if self.i < len(self.s) else None
+
+    def parse(self) -> Tuple[int, int]:
+        frag = self.alternation()
+        if self.i != len(self.s):
+            raise self.error(f"carácter inesperado {self.s[self.i]!r}")
+        return frag
+
+    def alternation(self) -> Tuple[int, int]:
+        branches = [self.concatenation()]
+        while self.peek() == "|":
+            self.i += 1
+            branches.append(self.concatenation())
+        if len(branches) == 1:
+            return branches[0]
+        start, end = self.nfa.state(), self.nfa.state()
+        for a, b in branches:
+            self.nfa.eps[start].append(a)
+            self.nfa.eps[b].append(end)
+        return start, end
+
+    def concatenation(self) -> Tuple[int, int]:
+        start = end = self.nfa.state()
+        while self.peek() not in (None, "|", ")"):
+            a, b = self.repetition()
+            self.nfa.eps[end].append(a)
+            end = b
+        return start, end
+
+    def repetition(self) -> Tuple[int, int]:
+        a, b = self.atom()
+        if self.peek() not in ("*", "+", "?"):
+            return a, b
+        op = self.s[self.i]
+        self.i += 1
+        # Un '?' tras el cuantificador lo hace perezoso, que con fullmatch no cambia el
+        # lenguaje; '+' lo haría posesivo. Como en re, no se pueden encadenar.
+        if self.peek() == "?":
+            self.i += 1
+        elif self.peek() == "+":
+            raise self.error("el cuantificador posesivo '+' no está soportado")
+        if self.peek() in ("*", "+", "?"):
+            raise self.error("repetición múltiple")
+        start, end = self.nfa.state(), self.nfa.state()
+        self.nfa.eps[start].append(a)
+        self.nfa.eps[b].append(end)
+        if op != "+":
+            self.nfa.eps[start].append(end)
+        if op != "?":
+            self.nfa.eps[b].append(a)
+        return start, end
+
+    def atom(self) -> Tuple[int, int]:
+        c = self.peek()
+        if c == "(":
+            self.i += 1
+            if self.s.startswith("?:", self.i):
+                self.i += 2
+            frag = self.alternation()
+            if self.peek() != ")":
+                raise self.error("falta ')'")
+            self.i += 1
+            return frag
+        if c == "[":
+            return self.symbols(self.char_class())
+        if c == "\\":
+            return self.symbols({self.escape(in_class=False)})
+        if c in _SPECIAL:
+            raise self.error(f"{c!r} no está soportado")
+        self.i += 1
+        return self.symbols({c})
+
+    def char_class(self) -> Set[str]:
+        self.i += 1
+        if self.peek() == "^":
+            raise self.error("las clases negadas no están soportadas")
+        chars: Set[str] = set()
+        while self.peek() not in (None, "]"):
+            c = self.class_char()
+            if self.peek() == "-" and self.i + 1 < len(self.s) and self.s[self.i + 1] != "]":
+                self.i += 1
+                hi = self.class_char()
+                if hi < c:
+                    raise self.error("rango de caracteres invertido")
+                chars.update(chr(k) for k in range(ord(c), ord(hi) + 1))
+            else:
+                chars.add(c)
+        if self.peek() != "]" or not chars:
+            raise self.error("clase de caracteres mal formada")
+        self.i += 1
+        return chars
+
+    def class_char(self) -> str:
+        c = self.s[self.i]
+        if c == "\\":
+            return self.escape(in_class=True)
+        self.i += 1
+        return c
+
+    def escape(self, in_class: bool) -> str:
+        # Consume un escape '\x' y devuelve el carácter que representa.
+        if self.i + 1 >= len(self.s):
+            raise self.error("'\\' al final del patrón")
+        c = self.s[self.i + 1]
+        if in_class and c == "b":
+            c = "\b"
+        elif c in _CONTROL:
+            c = _CONTROL[c]
+        elif c.isascii() and c.isalnum():
+            raise self.error(f"el escape '\\{c}' no está soportado")
+        self.i += 2
+        return c
+
+    def symbols(self, chars: Set[str]) -> Tuple[int, int]:
+        if BLANK in chars or EPSILON in chars:
+            raise self.error(f"{BLANK!r} y {EPSILON!r} están reservados para la cinta")
+        self.alphabet |= chars
+        start, end = self.nfa.state(), self.nfa.state()
+        for ch in sorted(chars):
+            self.nfa.edges[start].append((ch, end))
+        return start, end
+
+def _subsets(nfa: _NFA, start: int, end: int, alphabet: List[str]) -> Tuple[List[Dict[str, int]], List[bool]]:
+    # Construcción de subconjuntos. El conjunto vacío no se representa: un símbolo sin
+    # destino en `delta` lleva al estado muerto.
+    first = nfa.closure([start])
+    index = {first: 0}
+    order = [first]
+    delta: List[Dict[str, int]] = []
+    for current in order:
+        row: Dict[str, int] = {}
+        for a in alphabet:
+            moved = nfa.closure(t for q in current for sym, t in nfa.edges[q] if sym == a)
+            if not moved:
+                continue
+            if moved not in index:
+                index[moved] = len(order)
+                order.append(moved)
+            row[a] = index[moved]
+        delta.append(row)
+    return delta, [end in subset for subset in order]
+
+def _minimize(delta: List[Dict[str, int]], accepting: List[bool],
+              alphabet: List[str]) -> Tuple[List[Dict[str, int]], List[bool]]:
+    # Hopcroft sobre el AFD completado con un estado muerto (índice n), que se quita
+    # al final junto con todo lo que sea equivalente a él. El estado 0 sigue siendo el
+    # inicial y el resto se numera en orden de recorrido en anchura.
+    n = len(delta)
+    dead = n
+    full = [[row.get(a, dead) for a in alphabet] for row in delta] + [[dead] * len(alphabet)]
+    inverse: List[Dict[int, List[int]]] = [{} for _ in alphabet]
+    for q, row in enumerate(full):
+        for k, t in enumerate(row):
+            inverse[k].setdefault(t, []).append(q)
+    finals = {q for q in range(n) if accepting[q]}
+    blocks = [b for b in (finals, set(range(n + 1)) - finals) if b]
+    block_of = {q: b for b, members in enumerate(blocks) for q in members}
+    pending = set(range(len(blocks)))
+    while pending:
+        splitter = list(blocks[pending.pop()])
+        for k in range(len(alphabet)):
+            touched: Dict[int, Set[int]] = {}
+            for t in splitter:
+                for q in inverse[k].get(t, ()):
+                    touched.setdefault(block_of[q], set()).add(q)
+            for b, hit in touched.items():
+                members = blocks[b]
+                if len(hit) == len(members):
+                    continue
+                members -= hit
+                nb = len(blocks)
+                blocks.append(hit)
+                for q in hit:
+                    block_of[q] = nb
+                pending.add(nb if b in pending or len(hit) <= len(members) else b)
+    dead_block = block_of[dead]
+    if block_of[0] == dead_block:
+        return [{}], [False]
+    number = {block_of[0]: 0}
+    order = [0]
+    out: List[Dict[str, int]] = []
+    for q in order:
+        row: Dict[str, int] = {}
+        for a, t in zip(alphabet, full[q]):
+            b = block_of[t]
+            if b == dead_block:
+                continue
+            if b not in number:
+                number[b] = len(order)
+                order.append(t)
+            row[a] = number[b]
+        out.append(row)
+    return out, [accepting[q] for q in order]
+
+def _build(pattern: str) -> MachineSpec:
+    nfa = _NFA()
+    parser = _Parser(pattern, nfa)
+    start, end = parser.parse()
+    alphabet = sorted(parser.alphabet)
+    delta, accepting = _minimize(*_subsets(nfa, start, end, alphabet), alphabet)
+    names = [f"q{i}" for i in range(len(delta))]
+    d: Dict[str, Dict[str, Transition]] = {q: {} for q in names}
+    for q, row, acc in zip(names, delta, accepting):
+        for a in alphabet:
+            t = row.get(a)
+            d[q][a] = (Transition(a, Direction.R, names[t]) if t is not None
+                       else Transition(a, Direction.S, "q_reject"))
+        d[q][BLANK] = Transition(BLANK, Direction.S, "q_accept" if acc else "q_reject")
+    # Los símbolos fuera del alfabeto del patrón no tienen transición: step() pasa
+    # directamente al estado de rechazo.
+    return MachineSpec.from_delta(set(names) | {"q_accept", "q_reject"}, "q0",
+                                  {"q_accept"}, {"q_reject"}, d)
+
+_CACHE: Dict[str, MachineSpec] = {}
+_LOCK = threading.Lock()
+
+def compile_pattern(pattern: str) -> MachineSpec:
+    # Especificación mínima para `pattern`, compilada una vez por cadena de patrón. La
+    # especificación es inmutable, así que todas las máquinas del mismo patrón la
+    # comparten (y con ella la tabla compilada y su AFD).
+    try:
+        return _CACHE[pattern]
+    except KeyError:
+        pass
+    spec = _build(pattern)
+    with _LOCK:
+        return _CACHE.setdefault(pattern, spec)
+
+def regex_machine(pattern: str) -> TuringMachine:
+    # Máquina nueva, con su propia cinta, equivalente a `pattern`.
+    return TuringMachine.from_spec(compile_pattern(pattern))
+
+def compile_patterns(patterns: Iterable[str]) -> Dict[str, MachineSpec]:
+    # Carga en bloque (p. ej. un catálogo de patrones al arrancar), con la tabla
+    # compilada lista para evaluar.
+    out = {}
+    for pattern in patterns:
+        spec = compile_pattern(pattern)
+        spec.compile().dfa
+        out[pattern] = spec
+    return out
@@ -0,0 +1,165 @@
+﻿import argparse
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict
+
+from tmsim_gui import REGEX_TABLE, RESULT_CACHE, MachineSpec, ResultCache, RunResult
+
+# Servicio local de aceptación. Protocolo por líneas (UTF-8):
+#   petición:  nombre-de-máquina<TAB>cadena\n
+#   respuesta: ESTADO<TAB>pasos<TAB>estado-final\n   o   ERROR<TAB>mensaje\n
+# Se admiten peticiones encadenadas sin esperar respuesta; las respuestas salen en
+# el mismo orden. La cola por conexión está acotada: si el cliente no lee, se deja de
+# leer su socket y el control de flujo de TCP frena al emisor.
+
+DEFAULT_PORT = 8765
+QUEUE_SIZE = 256
+# Entradas más largas que esto se evalúan en el ejecutor para no bloquear el bucle.
+OFFLOAD_LENGTH = 4096
+MAX_STEPS = 10_000_000
+# Longitud máxima de una petición; una línea más larga se descarta y se responde ERROR.
+LINE_LIMIT = 1 << 24
+
+class AcceptanceService:
+    def __init__(self, executor: Executor | None = None, queue_size: int = QUEUE_SIZE,
+                 offload_length: int = OFFLOAD_LENGTH, max_steps: int | None = MAX_STEPS,
+                 detect_loops: bool = True, cache: ResultCache | None = RESULT_CACHE,
+                 line_limit: int = LINE_LIMIT):
+        # El catálogo se construye y compila una sola vez al arrancar.
+        self.machines: Dict[str, MachineSpec] = {}
+        for item in REGEX_TABLE:
+            spec = item["factory"]().spec
+            spec.compile().dfa
+            self.machines[item["name"]] = spec
+        self.executor = executor or ThreadPoolExecutor()
+        self.queue_size = queue_size
+        self.offload_length = offload_length
+        self.max_steps = max_steps
+        # Las máquinas que no son AFD pueden no terminar; se responde LOOPS al detectarlo.
+        self.detect_loops = detect_loops
+        self.cache = cache
+        self.line_limit = line_limit
+
+    def evaluate(self, name: str, s: str) -> RunResult:
+        return self._evaluate(self.machines[name], s)
+
+    def _evaluate(self, spec: MachineSpec, s: str) -> RunResult:
+        if self.cache is None:
+            return spec.evaluate(s, self.max_steps, self.detect_loops)
+        return self.cache.evaluate(spec, s, self.max_steps, self.detect_loops)
+
+    def _submit(self, line: bytes) -> "asyncio.Future[str]":
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        try:
+            name, _, s = line.decode("utf-8").rstrip("\r\n").partition("\t")
+            spec = self.machines[name]
+        except UnicodeDecodeError:
+            fut.set_result("ERROR\tpetición no es UTF-8")
+            return fut
+        except KeyError:
+            fut.set_result(f"ERROR\tmáquina desconocida: {name}")
+            return fut
+        if len(s) <= self.offload_length:
+            try:
+                fut.set_result(_format(self._evaluate(spec, s)))
+            except Exception as e:
+                fut.set_result(_error(e))
+            return fut
+        return asyncio.ensure_future(self._offload(spec, s))
+
+    async def _offload(self, spec: MachineSpec, s: str) -> str:
+        loop = asyncio.get_running_loop()
+        try:
+            return _format(await loop.run_in_executor(self.executor, self._evaluate, spec, s))
+        except Exception as e:
+            return _error(e)
+
+    async def _readline(self, reader: asyncio.StreamReader) -> bytes | None:
+        # Como readline(), pero una línea más larga que el límite del lector se descarta
+        # entera (hasta su salto de línea) y se devuelve None.
+        try:
+            return await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            return e.partial
+        except asyncio.LimitOverrunError as e:
+            consumed = e.consumed
+        while True:
+            try:
+                await reader.readexactly(consumed)
+                await reader.readuntil(b"\n")
+                return None
+            except asyncio.IncompleteReadError:
+                return None
+            except asyncio.LimitOverrunError as e:
+                consumed = e.consumed
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        pending: "asyncio.Queue[asyncio.Future[str] | None]" = asyncio.Queue(self.queue_size)
+
+        async def respond():
+            # Sigue vaciando la cola aunque el cliente haya cerrado, para que el lector
+            # nunca se quede bloqueado en put().
+            broken = False
+            while True:
+                fut = await pending.get()
+                if fut is None:
+                    return
+                line = await fut
+                if broken:
+                    continue
+                try:
+                    writer.write(line.encode("utf-8") + b"\n")
+                    await writer.drain()
+                except ConnectionError:
+                    broken = True
+
+        responder = asyncio.ensure_future(respond())
+        try:
+            while True:
+                try:
+                    line = await self._readline(reader)
+                except ConnectionError:
+                    break
+                if line is None:
+                    fut = asyncio.get_running_loop().create_future()
+                    fut.set_result(f"ERROR\tpetición de más de {self.line_limit} bytes")
+                    await pending.put(fut)
+                    continue
+                if not line:
+                    break
+                await pending.put(self._submit(line))
+            # Las respuestas pendientes salen antes de cerrar.
+            await pending.put(None)
+            await responder
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, path: str | None = None):
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle, path=path, limit=self.line_limit)
+        else:
+            server = await asyncio.start_server(self.handle, host, port, limit=self.line_limit)
+        async with server:
+            await server.serve_forever()
+
+def _format(r: RunResult) -> str:
+    return f"{r.status}\t{r.steps}\t{r.state}"
+
+def _error(e: Exception) -> str:
+    return "ERROR\t" + " ".join(f"{type(e).__name__}: {e}".split())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio local de aceptación de REGEX_TABLE")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="RUTA", help="escuchar en un socket Unix en lugar de TCP")
+    args = parser.parse_args(argv)
+    service = AcceptanceService()
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+﻿import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple, Union
+
+from tmsim_gui import REGEX_TABLE, Execution, MachineSpec, ResultCache, RunResult, input_digest
+
+# Caché persistente de resultados en SQLite: (huella de la máquina, resumen de la
+# entrada) -> resultado. La huella cambia en cuanto cambia la tabla de transiciones,
+# así que las filas viejas nunca coinciden; además se purgan al abrir el archivo
+# las de máquinas que ya no están en el catálogo. Las filas leídas o escritas se
+# guardan también en un ResultCache acotado (`memory_entries`, `memory_bytes`).
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    fingerprint TEXT NOT NULL,
+    input_hash BLOB NOT NULL,
+    status TEXT NOT NULL,
+    steps INTEGER NOT NULL,
+    head INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    cycle_length INTEGER,
+    cycle_start INTEGER,
+    PRIMARY KEY (fingerprint, input_hash)
+) WITHOUT ROWID
+"""
+
+class SQLiteResultCache:
+    def __init__(self, path: str, machines: Iterable[MachineSpec] | None = None,
+                 batch_size: int = 1000, memory_entries: int = 100_000,
+                 memory_bytes: int = 32 << 20):
+        # `machines`: catálogo vigente; las filas de cualquier otra huella se borran.
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(_SCHEMA)
+        self.conn.commit()
+        self.memory = ResultCache(memory_entries, memory_bytes)
+        self._pending: List[Tuple] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if machines is not None:
+            self.purge({spec.fingerprint for spec in machines})
+
+    @classmethod
+    def for_catalogue(cls, path: str, batch_size: int = 1000) -> "SQLiteResultCache":
+        return cls(path, [item["factory"]().spec for item in REGEX_TABLE], batch_size)
+
+    def purge(self, fingerprints: Iterable[str]):
+        keep = sorted(set(fingerprints))
+        with self._lock:
+            marks = ",".join("?" * len(keep))
+            self.conn.execute(f"DELETE FROM results WHERE fingerprint NOT IN ({marks})", keep)
+            self.conn.commit()
+        self.memory.retain(keep)
+
+    def warm(self, fingerprints: Iterable[str] | None = None) -> int:
+        # Carga en memoria las filas guardadas (todas o las de esas huellas).
+        query = "SELECT fingerprint, input_hash, status, steps, head, state, cycle_length, cycle_start FROM results"
+        args: List[str] = []
+        if fingerprints is not None:
+            args = sorted(set(fingerprints))
+            query += f" WHERE fingerprint IN ({','.join('?' * len(args))})"
+        with self._lock:
+            rows = self.conn.execute(query, args).fetchall()
+            for fp, digest, *result in rows:
+                self.memory.store((fp, bytes(digest)), RunResult(*result))
+        return len(rows)
+
+    def get(self, spec: MachineSpec, s, max_steps: int | None = None) -> RunResult | None:
+        key = (spec.fingerprint, input_digest(s))
+        with self._lock:
+            result = self.memory.lookup(key)
+            if result is None:
+                row = self.conn.execute(
+                    "SELECT status, steps, head, state, cycle_length, cycle_start FROM results "
+                    "WHERE fingerprint = ? AND input_hash = ?", key).fetchone()
+                if row is not None:
+                    result = RunResult(*row)
+                    self.memory.store(key, result)
+            if result is None or (max_steps is not None and result.steps > max_steps):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return result
+
+    def put(self, spec: MachineSpec, s, result: RunResult):
+        if result.status not in ResultCache.CACHEABLE:
+            return
+        key = (spec.fingerprint, input_digest(s))
+        with self._lock:
+            self.memory.store(key, result)
+            self._pending.append(key + (result.status, result.steps, result.head, result.state,
+                                        result.cycle_length, result.cycle_start))
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def evaluate(self, machine: Union[MachineSpec, Execution], s,
+                 max_steps: int | None = None, detect_loops: bool = False) -> RunResult:
+        spec = machine.spec if isinstance(machine, Execution) else machine
+        result = self.get(spec, s, max_steps)
+        if result is None:
+            result = spec.evaluate(s, max_steps, detect_loops)
+            self.put(spec, s, result)
+        return result
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self.conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                  self._pending)
+            self.conn.commit()
+            self._pending.clear()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self) -> "SQLiteResultCache":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self.memory.entries), "pending": len(self._pending),
+                "hits": self.hits, "misses": self.misses}